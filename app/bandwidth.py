@@ -0,0 +1,100 @@
+import time
+import threading
+import logging
+from collections import deque
+
+logger = logging.getLogger("Bandwidth")
+
+# Bucket depth in seconds of the current rate: the most a copy can send in
+# one go after being idle, so pauses never turn into bursts
+BURST_SECONDS = 0.25
+
+
+class TokenBucket:
+    """
+    Process-wide copy bandwidth limit. Every copy draws from the same bucket,
+    so the total stays at the configured rate no matter how many copies start
+    or stop. Waiters are served first-come first-served; with chunks sized by
+    chunk_hint() this gives each active job an equal share.
+    A rate of 0 means unlimited.
+    """
+
+    def __init__(self, rate=0):
+        self._cond = threading.Condition()
+        self._rate = float(rate)
+        self._tokens = 0.0
+        self._updated = time.monotonic()
+        self._waiters = deque()
+        self._jobs = set()
+
+    @property
+    def rate(self):
+        return self._rate
+
+    def set_rate(self, rate):
+        """Changes the limit (bytes/s) for running copies too."""
+        rate = max(0.0, float(rate or 0))
+        with self._cond:
+            if rate == self._rate:
+                return
+            self._refill()
+            self._rate = rate
+            # Never carry more than one burst of the new rate
+            self._tokens = min(self._tokens, rate * BURST_SECONDS)
+            self._cond.notify_all()
+        logger.info(f"Copy bandwidth limit set to {rate / 1024 / 1024:.1f} MB/s" if rate else "Copy bandwidth limit disabled")
+
+    def set_rate_mbps(self, mbps):
+        self.set_rate((mbps or 0) * 1024 * 1024)
+
+    def _refill(self):
+        now = time.monotonic()
+        if self._rate > 0:
+            self._tokens = min(self._tokens + (now - self._updated) * self._rate,
+                               self._rate * BURST_SECONDS)
+        self._updated = now
+
+    def register(self, job):
+        with self._cond:
+            self._jobs.add(job)
+
+    def unregister(self, job):
+        with self._cond:
+            self._jobs.discard(job)
+
+    def chunk_hint(self):
+        """
+        Bytes per chunk so every active job gets a turn each BURST_SECONDS
+        (None = unlimited). copy_file honours it below its MIN_CHUNK, so low
+        limits are paced smoothly instead of overdrawing the bucket.
+        """
+        if self._rate <= 0:
+            return None
+        return self._rate * BURST_SECONDS / max(1, len(self._jobs))
+
+    def acquire(self, nbytes):
+        """
+        Blocks until nbytes may be sent. Requests larger than the bucket
+        are allowed to run it into debt, which later callers then wait out.
+        """
+        ticket = object()
+        with self._cond:
+            self._waiters.append(ticket)
+            try:
+                while True:
+                    if self._rate <= 0:
+                        return
+                    self._refill()
+                    if self._waiters[0] is ticket and self._tokens >= 0:
+                        self._tokens -= nbytes
+                        return
+                    if self._waiters[0] is ticket:
+                        self._cond.wait(-self._tokens / self._rate)
+                    else:
+                        self._cond.wait()
+            finally:
+                self._waiters.remove(ticket)
+                self._cond.notify_all()
+
+
+BANDWIDTH = TokenBucket()
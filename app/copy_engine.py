@@ -0,0 +1,491 @@
+import os
+import json
+import time
+import errno
+import hashlib
+import logging
+
+try:
+    import xxhash
+except ImportError:  # Optional: BLAKE2 from hashlib is used instead
+    xxhash = None
+
+logger = logging.getLogger("CopyEngine")
+
+# Chunk size bounds (bytes). The size adapts so each chunk takes about
+# TARGET_CHUNK_SECONDS: small on slow SMB targets (smooth progress and stop),
+# large on fast local disks (few syscalls).
+MIN_CHUNK = 256 * 1024
+MAX_CHUNK = 64 * 1024 * 1024
+INITIAL_CHUNK = 1024 * 1024
+# Floor for chunks capped by the bandwidth limiter (max_chunk). Below
+# MIN_CHUNK so low limits pace smoothly instead of overdrawing the bucket
+RATE_LIMITED_MIN_CHUNK = 16 * 1024
+# The user-space fallback keeps one buffer per copy; cap its size
+MAX_BUFFER = 16 * 1024 * 1024
+TARGET_CHUNK_SECONDS = 0.25
+
+# Resumable copies: data goes to '<dst>.part', progress to '<dst>.part.json'
+PART_SUFFIX = '.part'
+CHECKPOINT_SUFFIX = '.part.json'
+# A checkpoint is written (after fsync) every CHECKPOINT_BYTES or CHECKPOINT_SECONDS
+CHECKPOINT_BYTES = 512 * 1024 * 1024
+CHECKPOINT_SECONDS = 30
+# Bytes before the checkpoint offset hashed to verify the .part on resume
+TAIL_BLOCK = 1024 * 1024
+
+# Errors meaning "this syscall can't do this pair of files", not "copy failed"
+UNSUPPORTED_ERRNOS = {errno.EXDEV, errno.ENOSYS, errno.EINVAL, errno.EOPNOTSUPP,
+                      errno.ENOTSUP, errno.EBADF, errno.ETXTBSY}
+
+
+def _copy_file_range(src_fd, dst_fd, offset, count):
+    # Kernel-side copy; reflinks/server-side copy where the filesystem supports it
+    return os.copy_file_range(src_fd, dst_fd, count, offset)
+
+
+def _sendfile(src_fd, dst_fd, offset, count):
+    # Kernel-side copy between two regular files (Linux >= 2.6.33)
+    return os.sendfile(dst_fd, src_fd, offset, count)
+
+
+def _zero_copy_methods():
+    methods = []
+    if hasattr(os, 'copy_file_range'):
+        methods.append(('copy_file_range', _copy_file_range))
+    if hasattr(os, 'sendfile') and os.name == 'posix':
+        methods.append(('sendfile', _sendfile))
+    return methods
+
+
+def _write_all(fd, view):
+    while view:
+        written = os.write(fd, view)
+        view = view[written:]
+
+
+def _next_chunk_size(chunk, nbytes, seconds):
+    """Scales the chunk towards TARGET_CHUNK_SECONDS from the measured throughput."""
+    if seconds <= 0 or nbytes < chunk:
+        return chunk
+    target = int(nbytes / seconds * TARGET_CHUNK_SECONDS)
+    # Grow/shrink at most 4x per step so one slow syscall doesn't swing it
+    target = max(chunk // 4, min(chunk * 4, target))
+    return max(MIN_CHUNK, min(MAX_CHUNK, target))
+
+
+# --- I/O policy ---
+
+# fallocate(2) mode: reserve blocks without changing the visible file size
+FALLOC_FL_KEEP_SIZE = 0x01
+# ioprio_set(2): syscall numbers per architecture, class IDLE for the calling thread
+IOPRIO_SYSCALLS = {'x86_64': 251, 'i386': 289, 'i686': 289, 'aarch64': 30, 'armv7l': 314, 'armv6l': 314}
+IOPRIO_WHO_PROCESS = 1
+IOPRIO_CLASS_NONE = 0
+IOPRIO_CLASS_IDLE = 3
+IOPRIO_CLASS_SHIFT = 13
+# Source pages older than this many bytes behind the copy position are dropped
+DROP_CACHE_LAG = 8 * 1024 * 1024
+
+_libc = None
+
+
+def _get_libc():
+    global _libc
+    if _libc is None:
+        import ctypes
+        import ctypes.util
+        _libc = ctypes.CDLL(ctypes.util.find_library('c') or None, use_errno=True)
+    return _libc
+
+
+class IOPolicy:
+    """
+    How a copy treats the page cache and the disk, so imports don't evict
+    the media server's working set or starve its reads:
+    preallocate  reserve the destination's blocks up front (less fragmentation)
+    drop_cache   read-ahead the source sequentially, then drop copied ranges
+                 of both files from the page cache
+    idle_priority  run the copying thread in the idle I/O class
+    """
+
+    def __init__(self, preallocate=True, drop_cache=True, idle_priority=False):
+        self.preallocate = preallocate
+        self.drop_cache = drop_cache
+        self.idle_priority = idle_priority
+
+    def apply_thread(self):
+        # Copy threads are reused, so also restore the default class when off
+        set_io_priority(IOPRIO_CLASS_IDLE if self.idle_priority else IOPRIO_CLASS_NONE)
+
+    def open_source(self, fd):
+        if self.drop_cache:
+            _fadvise(fd, 0, 0, 'POSIX_FADV_SEQUENTIAL')
+
+    def allocate(self, fd, offset, length):
+        if self.preallocate and length > 0:
+            preallocate(fd, offset, length)
+
+    def release(self, fd, offset, length):
+        """Drops [offset, offset+length) from the page cache (clean pages only)."""
+        if self.drop_cache and length > 0:
+            _fadvise(fd, offset, length, 'POSIX_FADV_DONTNEED')
+
+
+DEFAULT_IO_POLICY = IOPolicy()
+
+
+def _fadvise(fd, offset, length, advice):
+    if not hasattr(os, 'posix_fadvise'):
+        return
+    try:
+        os.posix_fadvise(fd, offset, length, getattr(os, advice))
+    except OSError:
+        pass
+
+
+def preallocate(fd, offset, length):
+    """
+    fallocate(2) with KEEP_SIZE. Unlike posix_fallocate, it never falls back to
+    writing zeros (which would double the I/O on SMB/NFS mounts); filesystems
+    without support are simply skipped.
+    """
+    try:
+        import ctypes
+        libc = _get_libc()
+        fallocate = libc.fallocate64 if hasattr(libc, 'fallocate64') else libc.fallocate
+        fallocate.argtypes = [ctypes.c_int, ctypes.c_int, ctypes.c_int64, ctypes.c_int64]
+        if fallocate(fd, FALLOC_FL_KEEP_SIZE, offset, length) != 0:
+            logger.debug(f"fallocate not supported here (errno {ctypes.get_errno()})")
+    except (OSError, AttributeError) as e:
+        logger.debug(f"fallocate unavailable: {e}")
+
+
+def set_io_priority(io_class):
+    """Sets the I/O scheduling class of the calling thread (Linux only)."""
+    import platform
+    syscall_nr = IOPRIO_SYSCALLS.get(platform.machine())
+    if syscall_nr is None:
+        return False
+    try:
+        libc = _get_libc()
+        result = libc.syscall(syscall_nr, IOPRIO_WHO_PROCESS, 0, io_class << IOPRIO_CLASS_SHIFT)
+        return result == 0
+    except (OSError, AttributeError):
+        return False
+
+
+# --- Integrity checksums ---
+
+def new_hasher(algorithm=None):
+    """
+    Fast hash for copy verification: xxh3_128 when the xxhash package is
+    installed, else BLAKE2b from hashlib.
+    """
+    if algorithm is None:
+        algorithm = 'xxh3_128' if xxhash else 'blake2b'
+    if algorithm == 'xxh3_128':
+        if not xxhash:
+            raise ValueError("xxhash is not installed")
+        return xxhash.xxh3_128()
+    return hashlib.new(algorithm)
+
+
+def hasher_name(hasher):
+    return 'xxh3_128' if xxhash and isinstance(hasher, xxhash.xxh3_128) else hasher.name
+
+
+def format_checksum(hasher):
+    return f"{hasher_name(hasher)}:{hasher.hexdigest()}"
+
+
+def _hash_range(fd, offset, length, hasher, view):
+    """Feeds length bytes of fd at offset into hasher, reading through view."""
+    while length > 0:
+        nbytes = os.preadv(fd, [view[:min(length, len(view))]], offset)
+        if not nbytes:
+            break
+        hasher.update(view[:nbytes])
+        offset += nbytes
+        length -= nbytes
+
+
+def file_checksum(path, algorithm=None, io_policy=DEFAULT_IO_POLICY):
+    """Checksum of a whole file ('algorithm:hexdigest'), read sequentially."""
+    hasher = new_hasher(algorithm)
+    view = memoryview(bytearray(MAX_BUFFER))
+    offset = 0
+    with open(path, 'rb', buffering=0) as f:
+        io_policy.open_source(f.fileno())
+        while True:
+            nbytes = f.readinto(view)
+            if not nbytes:
+                break
+            hasher.update(view[:nbytes])
+            io_policy.release(f.fileno(), offset, nbytes)
+            offset += nbytes
+    return format_checksum(hasher)
+
+
+def verify_checksum(path, expected, io_policy=DEFAULT_IO_POLICY):
+    """Re-reads path and compares with an 'algorithm:hexdigest' value."""
+    algorithm = expected.split(':', 1)[0]
+    return file_checksum(path, algorithm, io_policy) == expected
+
+
+def _tail_hash(fd, offset):
+    """sha256 of the TAIL_BLOCK bytes ending at offset."""
+    start = max(0, offset - TAIL_BLOCK)
+    digest = hashlib.sha256()
+    remaining = offset - start
+    while remaining > 0:
+        data = os.pread(fd, remaining, start)
+        if not data:
+            break
+        digest.update(data)
+        start += len(data)
+        remaining -= len(data)
+    return digest.hexdigest()
+
+
+def _source_id(src):
+    st = os.stat(src)
+    return {'src': os.path.abspath(src), 'src_size': st.st_size, 'src_mtime': st.st_mtime}
+
+
+def _write_checkpoint(checkpoint_path, source_id, offset, tail_hash):
+    tmp_path = f"{checkpoint_path}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(dict(source_id, offset=offset, tail_sha256=tail_hash), f)
+    os.replace(tmp_path, checkpoint_path)
+
+
+def resume_offset(src, dst):
+    """
+    Offset a previous interrupted copy of src to dst can continue from, or 0.
+    The checkpoint must belong to the same (unchanged) source, and the tail
+    block of the .part must hash to the recorded value.
+    """
+    part_path = dst + PART_SUFFIX
+    checkpoint_path = dst + CHECKPOINT_SUFFIX
+    try:
+        with open(checkpoint_path) as f:
+            checkpoint = json.load(f)
+        offset = int(checkpoint.get('offset', 0))
+        if offset <= 0:
+            return 0
+        if any(checkpoint.get(k) != v for k, v in _source_id(src).items()):
+            logger.info(f"Source changed since last attempt, restarting copy of {dst}")
+            return 0
+        if os.path.getsize(part_path) < offset:
+            return 0
+        with open(part_path, 'rb') as fpart:
+            if _tail_hash(fpart.fileno(), offset) != checkpoint.get('tail_sha256'):
+                logger.warning(f"Partial file does not match checkpoint, restarting copy of {dst}")
+                return 0
+        return offset
+    except (OSError, ValueError):
+        return 0
+
+
+def discard_partial(dst):
+    """Removes the .part file and checkpoint left by an interrupted copy."""
+    for path in (dst + PART_SUFFIX, dst + CHECKPOINT_SUFFIX):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+def copy_file(src, dst, on_chunk=None, max_chunk=None, hasher=None, io_policy=DEFAULT_IO_POLICY):
+    """
+    Copies src to dst, preferring zero-copy syscalls (copy_file_range, then
+    sendfile) and falling back to readinto() on a reused buffer.
+
+    Data is written to '<dst>.part' with a checkpoint sidecar, so a copy cut
+    short by an error, a stop or a restart continues from the last verified
+    offset next time; dst only appears (atomic rename) once complete.
+
+    on_chunk(copied_bytes, chunk_bytes) runs after every chunk (copied_bytes
+    includes resumed data); it may sleep (rate limiting)
+    or raise (e.g. InterruptedError on stop) to abort the copy.
+    max_chunk() may return a byte cap for the next chunk (None = no cap), so
+    a rate-limited copy sleeps in small steps instead of bursting; the cap
+    may go below MIN_CHUNK (down to RATE_LIMITED_MIN_CHUNK).
+    hasher (see new_hasher) is fed every source byte as it is copied. With
+    zero-copy syscalls the bytes are re-read from the page cache the kernel
+    just filled, so the source is not read from disk twice.
+    io_policy (IOPolicy) controls preallocation, page-cache use and I/O priority.
+    Returns the number of bytes copied by this call (excluding resumed data).
+    """
+    file_size = os.path.getsize(src)
+    source_id = _source_id(src)
+    part_path = dst + PART_SUFFIX
+    checkpoint_path = dst + CHECKPOINT_SUFFIX
+
+    start_offset = resume_offset(src, dst)
+    if start_offset:
+        logger.info(f"Resuming copy of {dst} at {start_offset / 1024 / 1024:.0f} MB")
+
+    methods = _zero_copy_methods()
+    chunk = INITIAL_CHUNK
+    copied = start_offset
+    checkpointed = start_offset
+    checkpoint_time = time.monotonic()
+    buffer = None
+    io_policy.apply_thread()
+
+    with open(src, 'rb', buffering=0) as fsrc, open(part_path, 'r+b' if start_offset else 'wb', buffering=0) as fdst:
+        src_fd = fsrc.fileno()
+        dst_fd = fdst.fileno()
+        if start_offset:
+            fdst.truncate(start_offset)
+            fdst.seek(start_offset)
+        io_policy.open_source(src_fd)
+        io_policy.allocate(dst_fd, start_offset, file_size - start_offset)
+        released = start_offset  # Source bytes before this were dropped from the page cache
+
+        hash_view = None
+        if hasher is not None and methods:
+            hash_view = memoryview(bytearray(MAX_BUFFER))
+        if hasher is not None and start_offset:
+            # Hash state isn't checkpointed: re-hash the resumed prefix from the source
+            _hash_range(src_fd, 0, start_offset, hasher, hash_view or memoryview(bytearray(MAX_BUFFER)))
+
+        def checkpoint():
+            nonlocal checkpointed, checkpoint_time
+            if copied == checkpointed:
+                return
+            os.fsync(dst_fd)
+            _write_checkpoint(checkpoint_path, source_id, copied, _tail_hash(src_fd, copied))
+            # Written back now, so these destination pages can be dropped
+            io_policy.release(dst_fd, checkpointed, copied - checkpointed)
+            checkpointed = copied
+            checkpoint_time = time.monotonic()
+
+        try:
+            while True:
+                count = chunk
+                if max_chunk:
+                    cap = max_chunk()
+                    if cap:
+                        count = max(RATE_LIMITED_MIN_CHUNK, min(count, int(cap)))
+
+                started = time.monotonic()
+                if methods:
+                    name, method = methods[0]
+                    try:
+                        nbytes = method(src_fd, dst_fd, copied, count)
+                    except OSError as e:
+                        if e.errno not in UNSUPPORTED_ERRNOS:
+                            raise
+                        logger.debug(f"{name} not usable for {dst} ({e}), trying next method")
+                        methods.pop(0)
+                        continue
+                    if nbytes == 0 and copied < file_size:
+                        # Some filesystems (FUSE, procfs-like) report 0 instead of failing
+                        methods.pop(0)
+                        continue
+                    if hasher is not None:
+                        _hash_range(src_fd, copied, nbytes, hasher, hash_view)
+                else:
+                    if buffer is None or len(buffer) < min(count, MAX_BUFFER):
+                        buffer = bytearray(min(max(count, INITIAL_CHUNK), MAX_BUFFER))
+                        view = memoryview(buffer)
+                        fsrc.seek(copied)
+                    nbytes = fsrc.readinto(view[:min(count, len(buffer))])
+                    if nbytes:
+                        _write_all(dst_fd, view[:nbytes])
+                        if hasher is not None:
+                            hasher.update(view[:nbytes])
+
+                if not nbytes:
+                    break
+
+                copied += nbytes
+                chunk = _next_chunk_size(chunk, nbytes, time.monotonic() - started)
+                if copied - released > DROP_CACHE_LAG:
+                    # Already copied and hashed: don't let the source crowd the page cache
+                    io_policy.release(src_fd, released, copied - released)
+                    released = copied
+                if (copied - checkpointed >= CHECKPOINT_BYTES or
+                        time.monotonic() - checkpoint_time >= CHECKPOINT_SECONDS):
+                    checkpoint()
+                if on_chunk:
+                    on_chunk(copied, nbytes)
+        except BaseException:
+            # Keep what was written so the next attempt can resume from here
+            try:
+                checkpoint()
+            except OSError as e:
+                logger.error(f"Could not checkpoint {part_path}: {e}")
+            raise
+
+        os.fsync(dst_fd)
+        io_policy.release(src_fd, released, copied - released)
+        io_policy.release(dst_fd, checkpointed, copied - checkpointed)
+
+    os.replace(part_path, dst)
+    try:
+        os.remove(checkpoint_path)
+    except FileNotFoundError:
+        pass
+    return copied - start_offset
+
+
+# --- Link-based imports ---
+
+IMPORT_MODES = ('auto', 'copy', 'hardlink', 'reflink')
+# ioctl(dst_fd, FICLONE, src_fd): share extents copy-on-write (Btrfs, XFS, bcachefs)
+FICLONE = 0x40049409
+
+
+def hardlink_file(src, dst):
+    os.link(src, dst)
+
+
+def reflink_file(src, dst):
+    import fcntl
+    with open(src, 'rb') as fsrc, open(dst, 'wb') as fdst:
+        try:
+            fcntl.ioctl(fdst.fileno(), FICLONE, fsrc.fileno())
+        except OSError:
+            fdst.close()
+            os.remove(dst)
+            raise
+
+
+LINKERS = {'hardlink': hardlink_file, 'reflink': reflink_file}
+
+
+def same_filesystem(src, dst_dir):
+    try:
+        return os.stat(src).st_dev == os.stat(dst_dir).st_dev
+    except OSError:
+        return False
+
+
+def link_methods(mode, src, dst_dir):
+    """Link methods worth trying for this import mode, in order (may be empty)."""
+    if mode == 'hardlink':
+        return ['hardlink']
+    if mode == 'reflink':
+        return ['reflink']
+    if mode == 'auto' and same_filesystem(src, dst_dir):
+        return ['hardlink', 'reflink']
+    return []
+
+
+def try_link(mode, src, dst):
+    """
+    Imports src as dst without copying bytes when the mode allows it.
+    Returns the method used ('hardlink'/'reflink') or None when the caller
+    should copy instead.
+    """
+    for method in link_methods(mode, src, os.path.dirname(dst)):
+        try:
+            LINKERS[method](src, dst)
+            return method
+        except OSError as e:
+            logger.warning(f"{method} failed for {dst}: {e}")
+    return None
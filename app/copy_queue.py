@@ -0,0 +1,305 @@
+import time
+import datetime
+import threading
+import logging
+from database import CopyJob, db, connection_scope
+from events import EVENTS
+
+logger = logging.getLogger("CopyQueue")
+
+DEFAULT_WORKERS = 2
+
+# Job priorities (higher runs first)
+PRIORITY_MANUAL = 10
+PRIORITY_AUTO = 0
+
+ACTIVE_STATUSES = ('queued', 'running')
+# Finished jobs kept for the job list
+FINISHED_JOBS_LIMIT = 50
+
+# Seconds a requeued job waits before it runs again
+RETRY_DELAY = 30
+# Requeues (counted ones, see RetryLater) before a job fails for good
+MAX_ATTEMPTS = 10
+# Seconds between checks while workers wait for ready()
+READY_POLL = 1
+
+
+class RetryLater(Exception):
+    """
+    Raised by the handler when a job can't run yet. The job goes back to
+    'queued' for `delay` seconds instead of failing. Only requeues with
+    counted=True count towards MAX_ATTEMPTS (a torrent that really is gone);
+    an unreachable torrent client can wait indefinitely.
+    """
+
+    def __init__(self, message, delay=RETRY_DELAY, counted=True):
+        super().__init__(message)
+        self.delay = delay
+        self.counted = counted
+
+
+def job_summary(job):
+    return {
+        'torrent_hash': job.torrent_hash,
+        'torrent_name': job.torrent_name,
+        'priority': job.priority,
+        'source': job.source,
+        'status': job.status,
+        'message': job.message,
+        'created_at': job.created_at,
+        'started_at': job.started_at,
+        'finished_at': job.finished_at,
+        'not_before': job.not_before
+    }
+
+
+class CopyQueue:
+    """
+    Persistent copy job queue (CopyJob table) served by a fixed pool of
+    worker threads, so a batch of 40 movies means 40 queued rows and at most
+    `workers` disk streams. Jobs run by priority, then position; one active
+    job per torrent hash. Jobs left 'running' by a restart are queued again.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._wakeup = threading.Condition(self._lock)
+        self._handler = None
+        self._stop_hook = None
+        self._ready = None
+        self._stopping = threading.Event()
+        self._workers = []
+        self._cancelled = set()  # Hashes of running jobs cancelled by the user
+
+    def start(self, handler, stop_hook=None, workers=DEFAULT_WORKERS, ready=None):
+        """
+        handler(torrent_hash) -> (success, message) performs the copy; it may
+        raise RetryLater to run the job again later.
+        stop_hook(torrent_hash) aborts a running copy (used by cancel).
+        ready() -> bool: workers claim no job while it is False (e.g. the
+        torrent list hasn't synced yet after a restart).
+        """
+        self._handler = handler
+        self._stop_hook = stop_hook
+        self._ready = ready
+
+        resumed = (CopyJob
+                   .update(status='queued', started_at=None, not_before=None)
+                   .where(CopyJob.status == 'running')
+                   .execute())
+        pending = CopyJob.select().where(CopyJob.status == 'queued').count()
+        if pending:
+            logger.info(f"Resuming {pending} pending copy jobs ({resumed} were interrupted)")
+
+        with self._lock:
+            if self._workers:
+                return
+            self._stopping.clear()
+            for i in range(max(1, int(workers))):
+                worker = threading.Thread(target=self._work, name=f"copy-{i}", daemon=True)
+                worker.start()
+                self._workers.append(worker)
+        logger.info(f"Copy queue started with {len(self._workers)} workers")
+
+    def stop(self, timeout=5):
+        """Stops the workers after their current job (a running copy is not aborted)."""
+        with self._lock:
+            self._stopping.set()
+            self._wakeup.notify_all()
+            workers, self._workers = self._workers, []
+        for worker in workers:
+            worker.join(timeout)
+
+    # --- Queue management ---
+
+    def enqueue(self, torrent_hash, torrent_name, priority=PRIORITY_MANUAL, source='manual'):
+        """
+        Queues a copy. If the torrent already has an active job, only raises
+        its priority. Returns True if a new job was queued.
+        """
+        with self._lock:
+            job = CopyJob.get_or_none(CopyJob.torrent_hash == torrent_hash)
+            if job and job.status in ACTIVE_STATUSES:
+                if priority > job.priority:
+                    job.priority = priority
+                    job.save(only=[CopyJob.priority])
+                return False
+
+            fields = {
+                'torrent_name': torrent_name,
+                'priority': priority,
+                'position': time.time(),
+                'source': source,
+                'status': 'queued',
+                'message': None,
+                'created_at': datetime.datetime.now(),
+                'started_at': None,
+                'finished_at': None,
+                'not_before': None,
+                'attempts': 0
+            }
+            if job:
+                CopyJob.update(**fields).where(CopyJob.id == job.id).execute()
+            else:
+                job = CopyJob.create(torrent_hash=torrent_hash, **fields)
+            self._wakeup.notify()
+
+        logger.info(f"Queued copy of {torrent_name} ({source}, priority {priority})")
+        self._publish(torrent_hash)
+        return True
+
+    def cancel(self, torrent_hash):
+        """Cancels a queued job, or stops a running one. Returns False if not active."""
+        with self._lock:
+            job = CopyJob.get_or_none(CopyJob.torrent_hash == torrent_hash)
+            if not job or job.status not in ACTIVE_STATUSES:
+                return False
+            was_running = job.status == 'running'
+            (CopyJob
+             .update(status='cancelled', message="Cancelled by user", finished_at=datetime.datetime.now())
+             .where(CopyJob.id == job.id)
+             .execute())
+            if was_running:
+                self._cancelled.add(torrent_hash)
+
+        if was_running and self._stop_hook:
+            self._stop_hook(torrent_hash)
+        self._publish(torrent_hash)
+        return True
+
+    def reorder(self, torrent_hashes):
+        """
+        Moves the given queued jobs to the front of their priority, in the
+        given order. Returns the number of jobs moved.
+        """
+        moved = 0
+        with self._lock:
+            first = (CopyJob
+                     .select(CopyJob.position)
+                     .where(CopyJob.status == 'queued')
+                     .order_by(CopyJob.position)
+                     .first())
+            start = (first.position if first else time.time()) - len(torrent_hashes)
+            with db.atomic():
+                for i, torrent_hash in enumerate(torrent_hashes):
+                    moved += (CopyJob
+                              .update(position=start + i)
+                              .where((CopyJob.torrent_hash == torrent_hash) & (CopyJob.status == 'queued'))
+                              .execute())
+        return moved
+
+    def is_cancelled(self, torrent_hash):
+        """True if the torrent's running job was cancelled (the handler should stop)."""
+        # Checked per copied chunk: no lock, set membership is atomic
+        return torrent_hash in self._cancelled
+
+    def set_priority(self, torrent_hash, priority):
+        with self._lock:
+            return bool(CopyJob
+                        .update(priority=int(priority))
+                        .where((CopyJob.torrent_hash == torrent_hash) & (CopyJob.status == 'queued'))
+                        .execute())
+
+    def list_jobs(self):
+        """Active jobs in run order, then the most recent finished ones."""
+        active = (CopyJob
+                  .select()
+                  .where(CopyJob.status.in_(ACTIVE_STATUSES))
+                  .order_by(CopyJob.status.desc(), CopyJob.priority.desc(), CopyJob.position))
+        finished = (CopyJob
+                    .select()
+                    .where(CopyJob.status.not_in(ACTIVE_STATUSES))
+                    .order_by(CopyJob.finished_at.desc())
+                    .limit(FINISHED_JOBS_LIMIT))
+        return {
+            "workers": len(self._workers),
+            "active": [job_summary(j) for j in active],
+            "finished": [job_summary(j) for j in finished]
+        }
+
+    # --- Workers ---
+
+    def _claim_next(self):
+        """Marks the next queued job as running and returns it (None if idle)."""
+        if self._ready and not self._ready():
+            self._stopping.wait(READY_POLL)
+            return None
+
+        with self._lock:
+            now = datetime.datetime.now()
+            job = (CopyJob
+                   .select()
+                   .where((CopyJob.status == 'queued') &
+                          (CopyJob.not_before.is_null() | (CopyJob.not_before <= now)))
+                   .order_by(CopyJob.priority.desc(), CopyJob.position)
+                   .first())
+            if not job:
+                if not self._stopping.is_set():
+                    self._wakeup.wait(timeout=RETRY_DELAY)
+                return None
+            job.status = 'running'
+            job.started_at = datetime.datetime.now()
+            self._cancelled.discard(job.torrent_hash)
+            job.save(only=[CopyJob.status, CopyJob.started_at])
+            return job
+
+    def _work(self):
+        while not self._stopping.is_set():
+            # Each job borrows a pooled connection and returns it when done
+            with connection_scope():
+                self._run_next()
+
+    def _run_next(self):
+        try:
+            job = self._claim_next()
+        except Exception as e:
+            logger.error(f"Error reading copy queue: {e}")
+            time.sleep(5)
+            return
+        if not job:
+            return
+
+        self._publish(job.torrent_hash)
+        try:
+            success, message = self._handler(job.torrent_hash)
+            status = 'done' if success else 'error'
+        except RetryLater as e:
+            self._requeue(job, e)
+            return
+        except Exception as e:
+            logger.error(f"Copy job failed for {job.torrent_name}: {e}")
+            status, message = 'error', str(e)
+
+        # A job cancelled while running keeps its 'cancelled' status
+        (CopyJob
+         .update(status=status, message=message, finished_at=datetime.datetime.now())
+         .where((CopyJob.id == job.id) & (CopyJob.status == 'running'))
+         .execute())
+        self._publish(job.torrent_hash)
+
+    def _requeue(self, job, retry):
+        attempts = job.attempts + (1 if retry.counted else 0)
+        if attempts > MAX_ATTEMPTS:
+            logger.error(f"Giving up on copy of {job.torrent_name}: {retry}")
+            fields = {'status': 'error', 'message': str(retry), 'finished_at': datetime.datetime.now()}
+        else:
+            logger.info(f"Copy of {job.torrent_name} requeued for {retry.delay}s: {retry}")
+            fields = {'status': 'queued', 'message': str(retry), 'started_at': None, 'attempts': attempts,
+                      'not_before': datetime.datetime.now() + datetime.timedelta(seconds=retry.delay)}
+        # A job cancelled meanwhile keeps its 'cancelled' status
+        (CopyJob
+         .update(**fields)
+         .where((CopyJob.id == job.id) & (CopyJob.status == 'running'))
+         .execute())
+        self._publish(job.torrent_hash)
+
+    def _publish(self, torrent_hash):
+        if not EVENTS.has_subscribers():
+            return
+        job = CopyJob.get_or_none(CopyJob.torrent_hash == torrent_hash)
+        if job:
+            EVENTS.publish('copy_job', job_summary(job))
+
+
+COPY_QUEUE = CopyQueue()
@@ -1,27 +1,117 @@
 from peewee import *
+from playhouse.pool import PooledSqliteDatabase
+from contextlib import contextmanager
 import datetime
+import functools
+import threading
 import os
 
+# One writer at a time inside this process: write transactions queue on this
+# lock instead of spinning on SQLite's busy_timeout, and WAL readers never wait.
+WRITE_LOCK = threading.RLock()
+
+# Statements that never write (run without WRITE_LOCK outside transactions)
+READ_PREFIXES = ('SELECT', 'EXPLAIN')
+
+
+class _SerializedTransaction:
+    """Top-level transaction holding WRITE_LOCK, started with BEGIN IMMEDIATE."""
+
+    def __init__(self, txn):
+        self._txn = txn
+
+    def __enter__(self):
+        WRITE_LOCK.acquire()
+        try:
+            return self._txn.__enter__()
+        except BaseException:
+            WRITE_LOCK.release()
+            raise
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        try:
+            return self._txn.__exit__(exc_type, exc_val, exc_tb)
+        finally:
+            WRITE_LOCK.release()
+
+
+class AppDatabase(PooledSqliteDatabase):
+    """
+    Pooled SQLite: each thread borrows its own connection (WAL allows
+    concurrent readers), while every write goes through WRITE_LOCK:
+    whole transactions (db.atomic()) and autocommit INSERT/UPDATE/DELETE.
+    """
+
+    def transaction(self, *args, **kwargs):
+        # Take the write lock up front; a deferred BEGIN upgraded later is
+        # what produces 'database is locked'
+        kwargs.setdefault('lock_type', 'IMMEDIATE')
+        return _SerializedTransaction(super().transaction(*args, **kwargs))
+
+    def execute_sql(self, sql, *args, **kwargs):
+        if self.in_transaction() or sql.lstrip()[:7].upper().startswith(READ_PREFIXES):
+            return super().execute_sql(sql, *args, **kwargs)
+        with WRITE_LOCK:
+            return super().execute_sql(sql, *args, **kwargs)
+
+
+# Sync endpoints run on AnyIO's worker threads; main caps that pool to this
+REQUEST_THREADS = 40
+# Other threads that hold a connection: event loop, torrent snapshot, library
+# index, write queue, enrichment and copy workers, image downloads
+BACKGROUND_CONNECTIONS = 24
+
 # Database file will be stored in /data to persist across restarts
-db = SqliteDatabase('/data/history.db', pragmas={
+db = AppDatabase('/data/history.db', max_connections=REQUEST_THREADS + BACKGROUND_CONNECTIONS,
+                 stale_timeout=300, timeout=10, pragmas={
     'journal_mode': 'wal',
     'cache_size': -1024 * 64,
     'foreign_keys': 1,
     'ignore_check_constraints': 0,
-    'synchronous': 0
+    'synchronous': 0,
+    'busy_timeout': 5000  # Other processes (e.g. reset_ignored.py) may still hold the lock
 })
 
+
+@contextmanager
+def connection_scope():
+    """
+    Borrows a pooled connection for the current thread for the duration of a
+    request or job and hands it back afterwards. Nested scopes (or a thread
+    that already has a connection open) reuse the open one.
+    """
+    opened = db.is_closed()
+    if opened:
+        db.connect()
+    try:
+        yield
+    finally:
+        if opened and not db.is_closed():
+            db.close()
+
+
+def db_scoped(func):
+    """Decorator: run func inside connection_scope()."""
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        with connection_scope():
+            return func(*args, **kwargs)
+    return wrapper
+
 class BaseModel(Model):
     class Meta:
         database = db
 
 class MoveHistory(BaseModel):
+    torrent_hash = CharField(null=True) # Links history to the torrent (indexed)
     torrent_name = CharField()
     source_path = CharField()
     dest_path = CharField()
     status = CharField() # 'success', 'skipped', 'error'
     message = TextField(null=True)
     timestamp = DateTimeField(default=datetime.datetime.now)
+    import_method = CharField(null=True) # 'copy', 'hardlink', 'reflink', 'mixed'
+    checksum = TextField(null=True) # JSON {dest file: 'algorithm:hexdigest'} of copied files
 
 class Movie(BaseModel):
     torrent_hash = CharField(unique=True)
@@ -53,16 +143,47 @@ class Movie(BaseModel):
     watchlist = BooleanField(default=False) # If True, movie is in watchlist monitoring
     watchlist_expiry = DateTimeField(null=True) # Expiration date for watchlist
 
-def migrate_db():
-    """
-    Migrates the database by adding new columns if they don't exist.
-    Safe to run multiple times.
-    """
+class UnresolvedTorrent(BaseModel):
+    torrent_hash = CharField(unique=True)
+    torrent_name = CharField()
+    attempts = IntegerField(default=0) # Failed TMDB lookups so far
+    last_attempt = DateTimeField(default=datetime.datetime.now)
+    next_attempt = DateTimeField(default=datetime.datetime.now) # No new lookup before this (backoff)
+
+class CopyJob(BaseModel):
+    torrent_hash = CharField(unique=True)
+    torrent_name = CharField()
+    priority = IntegerField(default=0) # Higher runs first (manual > auto)
+    position = FloatField(default=0) # Order within the same priority (lower first)
+    source = CharField(default='manual') # 'manual', 'batch', 'auto'
+    status = CharField(default='queued') # queued, running, done, error, cancelled
+    message = TextField(null=True)
+    created_at = DateTimeField(default=datetime.datetime.now)
+    started_at = DateTimeField(null=True)
+    finished_at = DateTimeField(null=True)
+    not_before = DateTimeField(null=True) # Requeued job: don't run before this (e.g. torrent list not synced yet)
+    attempts = IntegerField(default=0) # Requeues because the torrent was not found
+
+class SchemaMigration(BaseModel):
+    name = CharField(unique=True) # Migration step id, e.g. '0003_hot_path_indexes'
+    applied_at = DateTimeField(default=datetime.datetime.now)
+
+def _add_missing_columns(table, columns):
+    """ALTER TABLE ... ADD COLUMN for each (name, type) not in the table yet."""
     import logging
     logger = logging.getLogger("Database")
     
-    # List of new columns to add to Movie table
-    new_columns = [
+    cursor = db.execute_sql(f"PRAGMA table_info({table})")
+    existing_columns = {row[1] for row in cursor.fetchall()}
+    
+    for column_name, column_type in columns:
+        if column_name not in existing_columns:
+            logger.info(f"Adding column '{column_name}' to {table} table")
+            db.execute_sql(f"ALTER TABLE {table} ADD COLUMN {column_name} {column_type}")
+
+def _migration_0001_movie_columns():
+    # Columns added to Movie before migrations were tracked
+    _add_missing_columns('movie', [
         ('cast', 'TEXT'),
         ('crew', 'TEXT'),
         ('vote_average', 'REAL'),
@@ -76,24 +197,89 @@ def migrate_db():
         ('torrent_name', 'TEXT'),
         ('watchlist', 'BOOLEAN'),
         ('watchlist_expiry', 'DATETIME')
-    ]
+    ])
+
+def _migration_0002_movehistory_columns():
+    _add_missing_columns('movehistory', [
+        ('import_method', 'TEXT'),
+        ('checksum', 'TEXT')
+    ])
+
+def _migration_0003_hot_path_indexes():
+    # History lookups by torrent: latest entry, 'already moved?' checks
+    db.execute_sql("CREATE INDEX IF NOT EXISTS movehistory_name_status_ts ON movehistory (torrent_name, status, timestamp)")
+    db.execute_sql("CREATE INDEX IF NOT EXISTS movehistory_timestamp ON movehistory (timestamp)")
+    # RSS / watchlist duplicate checks by title (+ year), ignored and watchlist flags
+    db.execute_sql("CREATE INDEX IF NOT EXISTS movie_title_year_ignored ON movie (title, year, ignored)")
+    db.execute_sql("CREATE INDEX IF NOT EXISTS movie_title_watchlist ON movie (title, watchlist)")
+    db.execute_sql("CREATE INDEX IF NOT EXISTS movie_watchlist_expiry ON movie (watchlist, watchlist_expiry)")
+    db.execute_sql("CREATE INDEX IF NOT EXISTS movie_state ON movie (state)")
+    # Copy queue: next job to run
+    db.execute_sql("CREATE INDEX IF NOT EXISTS copyjob_status_priority ON copyjob (status, priority, position)")
+    db.execute_sql("CREATE INDEX IF NOT EXISTS unresolvedtorrent_next_attempt ON unresolvedtorrent (next_attempt)")
+
+def _migration_0004_movehistory_torrent_hash():
+    _add_missing_columns('movehistory', [('torrent_hash', 'TEXT')])
+    # Backfill from the dashboard rows; any rest is linked by name on first lookup
+    db.execute_sql("""
+        UPDATE movehistory
+        SET torrent_hash = (SELECT movie.torrent_hash FROM movie
+                            WHERE movie.torrent_name = movehistory.torrent_name
+                            LIMIT 1)
+        WHERE torrent_hash IS NULL
+    """)
+    db.execute_sql("CREATE INDEX IF NOT EXISTS movehistory_hash_status_ts ON movehistory (torrent_hash, status, timestamp)")
+
+def _migration_0005_copyjob_retry():
+    _add_missing_columns('copyjob', [
+        ('not_before', 'DATETIME'),
+        ('attempts', 'INTEGER DEFAULT 0')
+    ])
+
+# Ordered schema steps. Append new ones; never rename or reorder applied steps.
+MIGRATIONS = [
+    ('0001_movie_columns', _migration_0001_movie_columns),
+    ('0002_movehistory_columns', _migration_0002_movehistory_columns),
+    ('0003_hot_path_indexes', _migration_0003_hot_path_indexes),
+    ('0004_movehistory_torrent_hash', _migration_0004_movehistory_torrent_hash),
+    ('0005_copyjob_retry', _migration_0005_copyjob_retry),
+]
+
+def run_migrations():
+    """
+    Applies every MIGRATIONS step not yet recorded in SchemaMigration, each in
+    its own transaction, then refreshes planner statistics with ANALYZE.
+    """
+    import logging
+    logger = logging.getLogger("Database")
     
-    try:
-        cursor = db.execute_sql("PRAGMA table_info(movie)")
-        existing_columns = {row[1] for row in cursor.fetchall()}
-        
-        for column_name, column_type in new_columns:
-            if column_name not in existing_columns:
-                logger.info(f"Adding column '{column_name}' to Movie table")
-                db.execute_sql(f"ALTER TABLE movie ADD COLUMN {column_name} {column_type}")
-                logger.info(f"Successfully added column '{column_name}'")
-    except Exception as e:
-        logger.error(f"Error during migration: {e}")
-        raise
+    db.create_tables([SchemaMigration])
+    applied = {m.name for m in SchemaMigration.select(SchemaMigration.name)}
+    
+    ran = 0
+    for name, step in MIGRATIONS:
+        if name in applied:
+            continue
+        logger.info(f"Applying migration {name}")
+        try:
+            with db.atomic():
+                step()
+                SchemaMigration.create(name=name)
+        except Exception as e:
+            logger.error(f"Error during migration {name}: {e}")
+            raise
+        ran += 1
+    
+    if ran:
+        db.execute_sql("ANALYZE")
+        logger.info(f"Applied {ran} migrations")
+    else:
+        # Cheap; only re-analyzes tables whose statistics are out of date
+        db.execute_sql("PRAGMA optimize")
 
 def init_db():
-    db.connect()
-    db.execute_sql('PRAGMA busy_timeout = 5000')  # Wait up to 5 seconds if database is locked
-    db.create_tables([MoveHistory, Movie])
-    migrate_db()  # Run migration after creating tables
+    # Connection for the event loop thread (schedulers); busy_timeout is set on every connection via pragmas
+    db.connect(reuse_if_open=True)
+    db.create_tables([MoveHistory, Movie, UnresolvedTorrent, CopyJob])
+    run_migrations()  # Run migrations after creating tables
 
@@ -0,0 +1,85 @@
+import queue
+import threading
+import logging
+
+logger = logging.getLogger("Enrichment")
+
+DEFAULT_WORKERS = 2
+
+
+class EnrichmentQueue:
+    """
+    Deduplicating job queue + fixed pool of worker threads that fill in
+    TMDB/IMDb metadata and images for placeholder Movie rows, so sync_movies
+    never waits on network lookups.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._queue = queue.Queue()
+        self._queued = {}  # {torrent_hash: torrent_name} waiting for a worker
+        self._running = {}  # {torrent_hash: torrent_name} being processed
+        self._done = 0
+        self._failed = 0
+        self._handler = None
+        self._workers = []
+
+    def start(self, handler, workers=DEFAULT_WORKERS):
+        """handler(torrent_hash, torrent_name) -> bool (True if metadata was found)."""
+        self._handler = handler
+        with self._lock:
+            if self._workers:
+                return
+            for i in range(max(1, int(workers))):
+                worker = threading.Thread(target=self._work, name=f"enrichment-{i}", daemon=True)
+                worker.start()
+                self._workers.append(worker)
+        logger.info(f"Metadata enrichment started with {len(self._workers)} workers")
+
+    def enqueue(self, torrent_hash, torrent_name):
+        """Queues a job unless the same torrent is already queued or running."""
+        with self._lock:
+            if torrent_hash in self._queued or torrent_hash in self._running:
+                return False
+            self._queued[torrent_hash] = torrent_name
+        self._queue.put(torrent_hash)
+        return True
+
+    def is_pending(self, torrent_hash):
+        with self._lock:
+            return torrent_hash in self._queued or torrent_hash in self._running
+
+    def status(self):
+        with self._lock:
+            return {
+                "workers": len(self._workers),
+                "queued": len(self._queued),
+                "running": list(self._running.values()),
+                "done": self._done,
+                "failed": self._failed
+            }
+
+    def _work(self):
+        while True:
+            torrent_hash = self._queue.get()
+            with self._lock:
+                torrent_name = self._queued.pop(torrent_hash, None)
+                if torrent_name is None:
+                    continue
+                self._running[torrent_hash] = torrent_name
+
+            found = False
+            try:
+                found = self._handler(torrent_hash, torrent_name)
+            except Exception as e:
+                logger.error(f"Error enriching {torrent_name}: {e}")
+            finally:
+                with self._lock:
+                    self._running.pop(torrent_hash, None)
+                    if found:
+                        self._done += 1
+                    else:
+                        self._failed += 1
+
+
+ENRICHMENT = EnrichmentQueue()
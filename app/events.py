@@ -0,0 +1,66 @@
+import json
+import asyncio
+import threading
+import logging
+
+logger = logging.getLogger("Events")
+
+# Max pending events per client before it is asked to resync
+SUBSCRIBER_QUEUE_SIZE = 500
+
+
+class EventBus:
+    """
+    Fan-out of change events to connected server-sent-event clients.
+    publish() is thread-safe and can be called from the snapshot thread,
+    copy threads or the FastAPI threadpool. Each subscriber owns an
+    asyncio.Queue bound to the event loop that serves its stream.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers = []  # [(loop, queue)]
+
+    def subscribe(self):
+        """Must be called from inside the event loop serving the stream."""
+        loop = asyncio.get_running_loop()
+        queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        with self._lock:
+            self._subscribers.append((loop, queue))
+        return queue
+
+    def unsubscribe(self, queue):
+        with self._lock:
+            self._subscribers = [(l, q) for l, q in self._subscribers if q is not queue]
+
+    def has_subscribers(self):
+        return bool(self._subscribers)
+
+    def publish(self, event_type, data):
+        """Queues an event for every connected client. No-op without clients."""
+        with self._lock:
+            subscribers = list(self._subscribers)
+
+        for loop, queue in subscribers:
+            try:
+                loop.call_soon_threadsafe(_enqueue, queue, event_type, data)
+            except RuntimeError:
+                # Loop already closed (client gone during shutdown)
+                self.unsubscribe(queue)
+
+
+def _enqueue(queue, event_type, data):
+    try:
+        queue.put_nowait((event_type, data))
+    except asyncio.QueueFull:
+        # Slow client: drop pending diffs and ask it to refetch full state
+        while not queue.empty():
+            queue.get_nowait()
+        queue.put_nowait(('resync', {}))
+
+
+def format_sse(event_type, data):
+    return f"event: {event_type}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+EVENTS = EventBus()
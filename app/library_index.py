@@ -0,0 +1,255 @@
+import os
+import time
+import threading
+import logging
+
+try:
+    from inotify_simple import INotify, flags as inotify_flags
+except ImportError:  # Optional: fall back to mtime-driven rescans
+    INotify = None
+
+logger = logging.getLogger("LibraryIndex")
+
+# Seconds between mtime checks of the library root (polling mode)
+RESCAN_INTERVAL = 30
+# Seconds between full rescans, to catch changes inside existing folders
+FULL_RESCAN_INTERVAL = 600
+
+
+class LibraryIndex:
+    """
+    In-memory view of local_dest_path, two levels deep:
+    {entry_name: set(child names) for folders, None for files}.
+    Used to answer 'is this movie still in the library?' without a stat
+    per torrent per poll on slow (SMB) mounts.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._root = None
+        self._entries = {}
+        self._root_mtime = None
+        self._thread = None
+        self._stop = threading.Event()
+        self._inotify = None
+        self._watches = {}  # {wd: folder name ('' for root)}
+
+    # --- Queries ---
+
+    def is_ready(self, root=None):
+        return self._root is not None and (root is None or os.path.normpath(root) == self._root)
+
+    def exists(self, path):
+        """
+        Index-backed os.path.exists for paths at most two levels below the root.
+        Anything else (or an index for another root) falls back to the filesystem.
+        """
+        parts = self._relative_parts(path)
+        if parts is None or len(parts) > 2:
+            return os.path.exists(path)
+
+        with self._lock:
+            if not parts:
+                return True
+            children = self._entries.get(parts[0], False)
+            if children is False:
+                return False
+            if len(parts) == 1:
+                return True
+            return children is not None and parts[1] in children
+
+    # --- Explicit updates (our own copies/deletes) ---
+
+    def add(self, path):
+        parts = self._relative_parts(path)
+        if not parts or len(parts) > 2:
+            return
+        with self._lock:
+            if len(parts) == 1:
+                self._entries.setdefault(parts[0], set() if os.path.isdir(path) else None)
+            else:
+                children = self._entries.get(parts[0])
+                if children is None:
+                    children = set()
+                    self._entries[parts[0]] = children
+                children.add(parts[1])
+
+    def discard(self, path):
+        parts = self._relative_parts(path)
+        if not parts or len(parts) > 2:
+            return
+        with self._lock:
+            if len(parts) == 1:
+                self._entries.pop(parts[0], None)
+            else:
+                children = self._entries.get(parts[0])
+                if children:
+                    children.discard(parts[1])
+
+    # --- Scanning ---
+
+    def _relative_parts(self, path):
+        if not self._root or not path:
+            return None
+        path = os.path.normpath(path)
+        if path == self._root:
+            return []
+        if not path.startswith(self._root + os.sep):
+            return None
+        return path[len(self._root) + 1:].split(os.sep)
+
+    def _list_folder(self, folder_path):
+        try:
+            with os.scandir(folder_path) as it:
+                return {e.name for e in it}
+        except OSError:
+            return set()
+
+    def build(self, root):
+        """Full scan of root. Replaces the current index."""
+        root = os.path.normpath(root)
+        entries = {}
+        start = time.time()
+
+        try:
+            root_mtime = os.stat(root).st_mtime
+            with os.scandir(root) as it:
+                for entry in it:
+                    if entry.is_dir():
+                        entries[entry.name] = self._list_folder(entry.path)
+                    else:
+                        entries[entry.name] = None
+        except OSError as e:
+            logger.error(f"Error scanning library {root}: {e}")
+            return False
+
+        with self._lock:
+            self._root = root
+            self._entries = entries
+            self._root_mtime = root_mtime
+
+        logger.info(f"Library index built: {len(entries)} entries in {time.time() - start:.1f}s")
+        return True
+
+    def _rescan_if_changed(self):
+        """Cheap polling step: one stat of the root, re-list only when it changed."""
+        try:
+            root_mtime = os.stat(self._root).st_mtime
+        except OSError:
+            return
+        if root_mtime == self._root_mtime:
+            return
+
+        listing = {}
+        try:
+            with os.scandir(self._root) as it:
+                for entry in it:
+                    listing[entry.name] = entry
+        except OSError:
+            return
+
+        with self._lock:
+            known = dict(self._entries)
+
+        entries = {}
+        for name, entry in listing.items():
+            if name in known:
+                entries[name] = known[name]
+            elif entry.is_dir():
+                entries[name] = self._list_folder(entry.path)
+            else:
+                entries[name] = None
+
+        with self._lock:
+            self._entries = entries
+            self._root_mtime = root_mtime
+
+    # --- inotify ---
+
+    def _setup_inotify(self):
+        if INotify is None:
+            return False
+        try:
+            self._inotify = INotify()
+            mask = (inotify_flags.CREATE | inotify_flags.DELETE |
+                    inotify_flags.MOVED_FROM | inotify_flags.MOVED_TO)
+            self._watches = {self._inotify.add_watch(self._root, mask): ''}
+            with self._lock:
+                folders = [n for n, c in self._entries.items() if c is not None]
+            for name in folders:
+                self._watch_folder(name)
+            logger.info("Library index using inotify")
+            return True
+        except OSError as e:
+            logger.warning(f"inotify not available for {self._root}, using mtime rescans: {e}")
+            self._inotify = None
+            return False
+
+    def _watch_folder(self, name):
+        try:
+            mask = (inotify_flags.CREATE | inotify_flags.DELETE |
+                    inotify_flags.MOVED_FROM | inotify_flags.MOVED_TO)
+            wd = self._inotify.add_watch(os.path.join(self._root, name), mask)
+            self._watches[wd] = name
+        except OSError:
+            pass
+
+    def _process_inotify(self, timeout):
+        for event in self._inotify.read(timeout=int(timeout * 1000)):
+            folder = self._watches.get(event.wd)
+            if folder is None or not event.name:
+                continue
+            path = os.path.join(self._root, folder, event.name) if folder else os.path.join(self._root, event.name)
+            if event.mask & (inotify_flags.CREATE | inotify_flags.MOVED_TO):
+                self.add(path)
+                if not folder and os.path.isdir(path):
+                    with self._lock:
+                        self._entries[event.name] = self._list_folder(path)
+                    self._watch_folder(event.name)
+            else:
+                self.discard(path)
+
+    # --- Background service ---
+
+    def _run(self, get_root):
+        last_full = 0
+        while not self._stop.is_set():
+            root = get_root()
+            if not root:
+                self._stop.wait(RESCAN_INTERVAL)
+                continue
+
+            if not self.is_ready(root) and self._inotify is not None:
+                # Library root changed in settings: drop watches on the old one
+                self._inotify.close()
+                self._inotify = None
+
+            if not self.is_ready(root) or time.time() - last_full > FULL_RESCAN_INTERVAL:
+                if self.build(root):
+                    last_full = time.time()
+                    if self._inotify is None:
+                        self._setup_inotify()
+
+            if self._inotify is not None:
+                try:
+                    self._process_inotify(RESCAN_INTERVAL)
+                except Exception as e:
+                    logger.error(f"Error reading inotify events: {e}")
+                    self._inotify = None
+            else:
+                self._stop.wait(RESCAN_INTERVAL)
+                self._rescan_if_changed()
+
+    def start(self, get_root):
+        """get_root() returns the current local_dest_path (re-read every cycle)."""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, args=(get_root,), name="library-index", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+
+LIBRARY_INDEX = LibraryIndex()
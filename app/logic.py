@@ -3,13 +3,25 @@ import shutil
 import time
 import threading
 import logging
-import qbittorrentapi
 import re
 import json
 import requests
 import hashlib
-from datetime import datetime
-from database import MoveHistory
+from datetime import datetime, timedelta
+from database import MoveHistory, db_scoped
+from torrent_snapshot import SNAPSHOT
+from qb_client import QB_CLIENTS, QB_SETTINGS_KEYS
+from events import EVENTS
+from status_resolver import resolve_statuses, history_for
+from library_index import LIBRARY_INDEX
+from enrichment import ENRICHMENT
+from tmdb import TMDB, image_url
+from settings_store import SettingsStore
+from copy_engine import copy_file, try_link, discard_partial, new_hasher, format_checksum, verify_checksum, IOPolicy
+from bandwidth import BANDWIDTH
+from copy_queue import COPY_QUEUE, PRIORITY_MANUAL, PRIORITY_AUTO, RetryLater
+from path_resolver import resolve_source
+from write_queue import WRITES, FLUSH_TIMEOUT
 
 # Configure Logging
 logging.basicConfig(
@@ -27,9 +39,19 @@ DEFAULT_SETTINGS = {
     "qb_user": "admin",
     "qb_pass": "adminpass",
     "local_source_path": "",
+    "path_mappings": [],  # [{"remote": path in qBittorrent, "local": path here}]
     "local_dest_path": "",
     "tmdb_api_key": "",
     "copy_speed_limit": 10,
+    "import_mode": "auto",  # 'auto', 'copy', 'hardlink' or 'reflink'
+    "verify_after_copy": False,  # Re-read copied files and compare checksums
+    "parallel_file_copies": 2,  # Files copied at once for directory torrents
+    "copy_preallocate": True,  # Reserve destination blocks before copying
+    "copy_drop_cache": True,  # Keep copied data out of the page cache (protects media server)
+    "copy_idle_io": False,  # Run copies at idle I/O priority
+    "qb_sync_interval": 2,
+    "metadata_workers": 2,
+    "copy_workers": 2,
     "auto_copy_manual_search": False,
     "indexers": [],
     "rss_feeds": [],
@@ -41,6 +63,12 @@ DEFAULT_SETTINGS = {
     "language": "es-ES"  # Default to Spanish for backwards compatibility
 }
 
+SETTINGS = SettingsStore(SETTINGS_FILE, DEFAULT_SETTINGS)
+
+# Backoff for torrents TMDB could not match (seconds)
+UNRESOLVED_BACKOFF_BASE = 15 * 60
+UNRESOLVED_BACKOFF_MAX = 24 * 60 * 60
+
 # Global State
 COPY_PROGRESS = {} # {hash: {percent: float, speed: float, status: str}}
 STOP_FLAGS = set() # Set of hashes to stop
@@ -126,7 +154,8 @@ def clean_torrent_name(name):
     title = base.replace('.', ' ').strip()
     return title, None
 
-from database import MoveHistory, Movie
+from database import MoveHistory, Movie, UnresolvedTorrent, db
+from peewee import chunked
 
 def download_image(url, filename, force=False):
     """
@@ -158,6 +187,7 @@ def download_image(url, filename, force=False):
     
     return None
 
+@db_scoped
 def download_image_background(url, filename, movie_id, is_poster=True):
     """
     Downloads image in background and updates database when done.
@@ -169,12 +199,10 @@ def download_image_background(url, filename, movie_id, is_poster=True):
             # Since Peewee handles connection pooling, we can just use the model
             from database import Movie
             try:
-                movie = Movie.get_by_id(movie_id)
                 if is_poster:
-                    movie.poster_path = local_path
+                    WRITES.update(Movie, movie_id, poster_path=local_path)
                 else:
-                    movie.backdrop_path = local_path
-                movie.save()
+                    WRITES.update(Movie, movie_id, backdrop_path=local_path)
                 logger.info(f"Background download complete for {filename}")
             except Exception as e:
                 logger.error(f"Error updating DB after background download: {e}")
@@ -222,6 +250,37 @@ def scrape_imdb_rating(imdb_id):
         logger.error(f"Error scraping IMDb: {e}")
     return None, None
 
+def parse_credits(credits):
+    """
+    Reduces a TMDB credits object to the cast (top 10) and key crew roles we store.
+    Returns (cast, crew) lists.
+    """
+    # Process cast (top 10)
+    cast = []
+    for person in credits.get('cast', [])[:10]:
+        cast.append({
+            "name": person.get('name'),
+            "character": person.get('character'),
+            "profile_path": image_url(person.get('profile_path'), 'w185')
+        })
+    
+    # Process crew (key roles)
+    crew = []
+    key_jobs = ['Director', 'Writer', 'Screenplay', 'Producer']
+    seen_names = set()
+    for person in credits.get('crew', []):
+        if person.get('job') in key_jobs and person.get('name') not in seen_names:
+            crew.append({
+                "name": person.get('name'),
+                "job": person.get('job'),
+                "profile_path": image_url(person.get('profile_path'), 'w185')
+            })
+            seen_names.add(person.get('name'))
+            if len(crew) >= 10:
+                break
+    
+    return cast, crew
+
 def fetch_complete_movie_metadata(title, year, api_key, images_only=False):
     """
     Fetches complete movie metadata from TMDB including cast, crew, and ratings.
@@ -230,10 +289,8 @@ def fetch_complete_movie_metadata(title, year, api_key, images_only=False):
     """
     try:
         # 1. Search for movie
-        search_url = "https://api.themoviedb.org/3/search/movie"
-        params = {"api_key": api_key, "query": title, "language": get_language(), "year": year}
-        res = requests.get(search_url, params=params, timeout=5)
-        search_data = res.json()
+        language = get_language()
+        _, search_data = TMDB.search_movie(title, api_key, language=language, year=year)
         
         if not search_data.get('results'):
             return None
@@ -241,13 +298,9 @@ def fetch_complete_movie_metadata(title, year, api_key, images_only=False):
         result = search_data['results'][0]
         movie_id = result['id']
         
-        # 2. Get full details
-        details_url = f"https://api.themoviedb.org/3/movie/{movie_id}"
-        details_res = requests.get(details_url, params={"api_key": api_key, "language": get_language()}, timeout=5)
-        details = details_res.json()
-        
-        # If we only need images, return early
+        # If we only need images, return early (details only, no sub-resources)
         if images_only:
+            _, details = TMDB.movie(movie_id, api_key, language=language)
             return {
                 'title': details.get('title'),
                 'year': details.get('release_date', '')[:4],
@@ -255,39 +308,12 @@ def fetch_complete_movie_metadata(title, year, api_key, images_only=False):
                 'backdrop_path': details.get('backdrop_path'),
             }
 
-        # 3. Get credits (cast & crew)
-        credits_url = f"https://api.themoviedb.org/3/movie/{movie_id}/credits"
-        credits_res = requests.get(credits_url, params={"api_key": api_key}, timeout=5)
-        credits = credits_res.json()
-        
-        # 4. Get external IDs (IMDb)
-        external_ids_url = f"https://api.themoviedb.org/3/movie/{movie_id}/external_ids"
-        external_ids_res = requests.get(external_ids_url, params={"api_key": api_key}, timeout=5)
-        external_ids = external_ids_res.json()
+        # 2. Full details + credits (cast & crew) + external IDs (IMDb) in one request
+        _, details = TMDB.movie(movie_id, api_key, language=language, append=['credits', 'external_ids'])
+        credits = details.get('credits') or {}
+        external_ids = details.get('external_ids') or {}
         
-        # Process cast (top 10)
-        cast = []
-        for person in credits.get('cast', [])[:10]:
-            cast.append({
-                "name": person.get('name'),
-                "character": person.get('character'),
-                "profile_path": f"https://image.tmdb.org/t/p/w185{person.get('profile_path')}" if person.get('profile_path') else None
-            })
-        
-        # Process crew (key roles)
-        crew = []
-        key_jobs = ['Director', 'Writer', 'Screenplay', 'Producer']
-        seen_names = set()
-        for person in credits.get('crew', []):
-            if person.get('job') in key_jobs and person.get('name') not in seen_names:
-                crew.append({
-                    "name": person.get('name'),
-                    "job": person.get('job'),
-                    "profile_path": f"https://image.tmdb.org/t/p/w185{person.get('profile_path')}" if person.get('profile_path') else None
-                })
-                seen_names.add(person.get('name'))
-                if len(crew) >= 10:
-                    break
+        cast, crew = parse_credits(credits)
         
         # Get IMDb rating if available
         imdb_id = external_ids.get('imdb_id')
@@ -318,95 +344,80 @@ def fetch_complete_movie_metadata(title, year, api_key, images_only=False):
         return None
 
 
+# Serializes sync_movies runs (snapshot listener vs. /api/movies requests)
+SYNC_LOCK = threading.Lock()
+
+# Columns sync_movies reads/writes; avoids loading cast/crew JSON on every poll
+SYNC_MOVIE_COLUMNS = (
+    Movie.id, Movie.torrent_hash, Movie.title, Movie.year, Movie.poster_path,
+    Movie.backdrop_path, Movie.overview, Movie.status, Movie.progress,
+    Movie.state, Movie.size, Movie.ignored, Movie.torrent_name
+)
+
 def sync_movies(torrents, api_key):
     """
     Syncs active torrents with the Movie database.
     - Adds new movies (fetches TMDB, downloads images).
     - Updates status/progress for existing movies.
     - Does NOT delete movies if torrent is missing (independent dashboard).
+    Runs from the snapshot thread and from /api/movies; SYNC_LOCK keeps the
+    runs from overlapping.
+    Does nothing until the torrent snapshot has synced once: an empty list
+    would mark every movie as orphaned and lose finished-download transitions.
     """
     if not api_key:
         return
+    if not SNAPSHOT.is_ready():
+        logger.debug("Torrent snapshot not synced yet, skipping movie sync")
+        return
+
+    with SYNC_LOCK:
+        _sync_movies(torrents, api_key)
+
+def _sync_movies(torrents, api_key):
 
     # 1. Update existing movies based on current torrents
     torrent_map = {t['hash']: t for t in torrents}
+    statuses = resolve_statuses(torrents, load_settings(), copying=set(COPY_PROGRESS))
+    
+    # Load every known movie for these torrents at once (only the columns sync needs)
+    movies_by_hash = {}
+    for chunk in chunked(list(torrent_map), 500):
+        for m in Movie.select(*SYNC_MOVIE_COLUMNS).where(Movie.torrent_hash.in_(chunk)):
+            movies_by_hash[m.torrent_hash] = m
+    
+    dirty = {}  # {movie: [changed field names]}
+    completed = []  # [(movie, torrent)] whose download just finished
     
     # Update active torrents
     for t in torrents:
-        movie = Movie.get_or_none(Movie.torrent_hash == t['hash'])
+        movie = movies_by_hash.get(t['hash'])
         
         if movie:
             # Skip if ignored
             if movie.ignored:
                 continue
 
-            # Update dynamic fields
-            movie.progress = t['progress']
-            movie.state = t['state']
-            movie.size = t['size']
+            # Dynamic fields, compared in memory so only real changes are written
+            values = {
+                'progress': t['progress'],
+                'state': t['state'],
+                'size': t['size'],
+                'status': statuses[t['hash']][0]
+            }
             
             # Backfill torrent_name if missing
             if not movie.torrent_name:
-                movie.torrent_name = t['name']
+                values['torrent_name'] = t['name']
             
-            # Check if copying
-            if t['hash'] in COPY_PROGRESS:
-                movie.status = 'copying'
-            else:
-                # 1. Check current state (Prioritize active downloading)
-                state = t['state']
-                is_downloading = state in ['metaDL', 'allocating', 'queuedDL', 'downloading', 'forceDL', 'stalledDL', 'pausedDL']
-                
-                if is_downloading:
-                    if state in ['metaDL', 'allocating', 'queuedDL']:
-                        movie.status = 'new'
-                    else:
-                        movie.status = 'downloading'
-                else:
-                    # 2. If not downloading, check history (Has it been moved before?)
-                    history = MoveHistory.select().where(MoveHistory.torrent_name == t['name']).order_by(MoveHistory.timestamp.desc()).first()
-                    if history:
-                         if history.status == 'success' or history.status == 'manual':
-                             # Verify existence
-                             settings = load_settings()
-                             local_dest = settings.get('local_dest_path')
-                             
-                             # Reconstruct path logic
-                             if local_dest and 'content_path' in t:
-                                 normalized_path = t['content_path'].replace('\\', '/')
-                                 item_name = os.path.basename(normalized_path.rstrip('/'))
-                                 match = re.search(r"(.+?)\s\((\d{4})\)", item_name)
-                                 
-                                 if match:
-                                     title = match.group(1).strip()
-                                     year = match.group(2).strip()
-                                     folder_name = f"{title} ({year})"
-                                     dest_path = os.path.join(local_dest, folder_name)
-                                     
-                                     if os.path.exists(dest_path):
-                                         movie.status = 'moved' if history.status == 'success' else 'moved_manually'
-                                     else:
-                                         movie.status = 'missing'
-                                 else:
-                                     movie.status = 'moved' if history.status == 'success' else 'moved_manually'
-                             else:
-                                 movie.status = 'moved' if history.status == 'success' else 'moved_manually'
-                                 
-                         elif history.status == 'error': movie.status = 'error'
-                         elif history.status == 'skipped': movie.status = 'skipped'
-                    else:
-                        # 3. No history and not downloading -> Pending or Error
-                        if state in ['uploading', 'pausedUP', 'queuedUP', 'stalledUP', 'completed', 'checkingUP', 'checkingDL']:
-                            movie.status = 'pending'
-                        elif state in ['error', 'missingFiles']:
-                            movie.status = 'error'
-                        else:
-                            movie.status = 'pending' # Default fallback
+            changed = [f for f, v in values.items() if getattr(movie, f) != v]
+            if not changed:
+                continue
             
             # Check for status change from downloading to pending (download completed)
-            old_status = Movie.get_or_none(Movie.torrent_hash == t['hash']).status if movie.id else None
-            
-            movie.save()
+            old_status = movie.status
+            for f in changed:
+                setattr(movie, f, values[f])
             
             # AUTO-COPY: Trigger copy if download just completed and RSS feed has auto_copy enabled
             # Expanded to detect multiple final states (not just 'pending') for better reliability
@@ -414,123 +425,61 @@ def sync_movies(torrents, api_key):
                                 movie.status in ['pending', 'uploading', 'completed', 'queuedUP', 'stalledUP'])
             
             if download_completed:
-                logger.info(f"Movie '{movie.title}' download completed, checking auto-copy...")
-                
-                # Notify Telegram: Download Complete
-                settings = load_settings()
-                if settings.get('telegram_notify_on_download_complete', True):
-                    send_telegram_notification(f"✅ <b>Download Complete</b>\n\n🎬 {movie.title} ({movie.year})\n💾 Ready to move.")
-
-                #  Check if this movie came from RSS with auto_copy enabled
-                settings = load_settings()
-                rss_feeds = settings.get('rss_feeds', [])
-                auto_copy_manual = settings.get('auto_copy_manual_search', False)
-                
-                # Match by label/tag
-                torrent_tags = t.get('tags', '')
-                torrent_category = t.get('category', '')
-                
-                # DEBUG: Verify tags are now available
-                logger.info(f"DEBUG: Torrent tags for '{movie.title}': '{torrent_tags}'")
-                logger.info(f"DEBUG: Torrent category for '{movie.title}': '{torrent_category}'")
-                logger.info(f"DEBUG: Number of RSS feeds configured: {len(rss_feeds)}")
-                logger.info(f"DEBUG: Auto-copy manual search enabled: {auto_copy_manual}")
-                
-                # First, check RSS feeds
-                rss_matched = False
-                for feed in rss_feeds:
-                    feed_label = feed.get('label', '')
-                    feed_auto_copy = feed.get('auto_copy', False)
-                    logger.info(f"DEBUG: Checking RSS feed '{feed.get('name')}' - label: '{feed_label}', auto_copy: {feed_auto_copy}")
-                    
-                    if feed_label and feed_label in torrent_tags:
-                        logger.info(f"DEBUG: Label '{feed_label}' found in torrent tags!")
-                        if feed.get('auto_copy', False):
-                            logger.info(f"Auto-copying '{movie.title}' from RSS feed '{feed.get('name')}'")
-                            try:
-                                manual_move(t['hash'])
-                                rss_matched = True
-                            except Exception as e:
-                                logger.error(f"Auto-copy failed for '{movie.title}': {e}")
-                        else:
-                            logger.info(f"DEBUG: auto_copy is disabled for this feed")
-                        break
-                    else:
-                        logger.info(f"DEBUG: Label '{feed_label}' NOT found in tags '{torrent_tags}'")
-                
-                # If not matched by RSS, check manual search tag
-                if not rss_matched:
-                    if auto_copy_manual and MANUAL_SEARCH_TAG in torrent_tags:
-                        logger.info(f"Auto-copying '{movie.title}' from manual search")
-                        try:
-                            manual_move(t['hash'])
-                        except Exception as e:
-                            logger.error(f"Auto-copy failed for '{movie.title}': {e}")
-                    else:
-                        logger.info(f"DEBUG: No auto-copy match found (RSS or manual search)")
-                
-                logger.info(f"DEBUG: Auto-copy check completed for '{movie.title}'")
+                # The status is written by the conditional UPDATE below, not the write queue
+                completed.append((movie, t))
+                changed = [f for f in changed if f != 'status']
+            dirty[movie] = changed
         else:
             # Check if it's a series
             if is_series(t['name']):
                 logger.info(f"Skipping series: {t['name']}")
                 continue
 
-            # New Movie Found!
+            # New Movie Found! Insert a placeholder now, metadata is filled in by the enrichment workers
             logger.info(f"New movie detected: {t['name']}")
             try:
-                # Fetch complete TMDB metadata
                 title, year = clean_torrent_name(t['name'])
-                metadata = fetch_complete_movie_metadata(title, year, api_key)
+                inserted = Movie.insert(
+                    torrent_hash=t['hash'],
+                    title=title,
+                    year=year,
+                    state=t['state'],
+                    progress=t['progress'],
+                    size=t['size'],
+                    status=statuses[t['hash']][0],
+                    torrent_name=t['name']
+                ).on_conflict_ignore().execute()
                 
-                poster_local = None
-                backdrop_local = None
+                if inserted:
+                    new_movie = Movie.get_or_none(Movie.torrent_hash == t['hash'])
+                    if new_movie:
+                        EVENTS.publish('movie', movie_summary(new_movie))
                 
-                if metadata:
-                    # Download Images
-                    if metadata.get('poster_path'):
-                        poster_url = f"https://image.tmdb.org/t/p/w500{metadata.get('poster_path')}"
-                        poster_local = download_image(poster_url, f"{t['hash']}_poster.jpg")
-                        
-                    if metadata.get('backdrop_path'):
-                        backdrop_url = f"https://image.tmdb.org/t/p/w1280{metadata.get('backdrop_path')}"
-                        backdrop_local = download_image(backdrop_url, f"{t['hash']}_backdrop.jpg")
-                    
-                    # Create DB Entry with complete metadata
-                    if not Movie.select().where(Movie.torrent_hash == t['hash']).exists():
-                        Movie.create(
-                            torrent_hash=t['hash'],
-                            title=metadata.get('title', title),
-                            year=metadata.get('year', year),
-                            poster_path=poster_local,
-                            backdrop_path=backdrop_local,
-                            overview=metadata.get('overview'),
-                            runtime=metadata.get('runtime'),
-                            genres=metadata.get('genres'), # Already JSON string from fetch_complete_movie_metadata
-                            state=t['state'],
-                            progress=t['progress'],
-                            size=t['size'],
-                            status='pending',
-                            cast=metadata.get('cast'), # Already JSON string
-                            crew=metadata.get('crew'), # Already JSON string
-                            vote_average=metadata.get('vote_average'),
-                            vote_count=metadata.get('vote_count'),
-                            imdb_id=metadata.get('imdb_id'),
-                            imdb_rating=metadata.get('imdb_rating'),
-                            imdb_votes=metadata.get('imdb_votes'),
-                            tmdb_id=metadata.get('tmdb_id'),  # Save TMDB ID for multi-language search
-                            metadata_updated_at=datetime.now(),
-                            torrent_name=t['name']
-                        )
-                        
-                        # Notify Telegram: New Movie Found
-                        settings = load_settings()
-                        if settings.get('telegram_notify_on_new_movie', True):
-                            send_telegram_notification(f"🆕 <b>New Movie Found</b>\n\n🎬 {metadata.get('title', title)} ({metadata.get('year', year)})\n📥 Added to Dashboard.")
+                if not is_unresolved_backoff(t['hash']):
+                    ENRICHMENT.enqueue(t['hash'], t['name'])
 
             except Exception as e:
                 logger.error(f"Error adding movie {t['name']}: {e}")
 
+    # Write all changed rows in one transaction, one batched UPDATE per set of changed columns
+    _write_movie_changes(dirty)
+    
+    for movie in dirty:
+        EVENTS.publish('movie', movie_summary(movie))
+    
+    # Claim each completion with a conditional UPDATE: only the sync that
+    # actually moves the row off 'downloading' notifies and auto-copies.
+    # Flush first so an older queued status write can't land on top of it.
+    if completed:
+        WRITES.flush(timeout=FLUSH_TIMEOUT)
+    for movie, t in completed:
+        claimed = (Movie
+                   .update(status=movie.status)
+                   .where((Movie.id == movie.id) & (Movie.status == 'downloading'))
+                   .execute())
+        if claimed:
+            _handle_download_completed(movie, t)
+
     # 2. Cleanup Ignored Movies - DISABLED
     # DO NOT delete ignored movies when torrent disappears from torrent client
     # Reason: Ignored movies must persist permanently until user manually un-ignores them
@@ -562,20 +511,278 @@ def sync_movies(torrents, api_key):
 
     
     # 3. Mark movies as orphaned if they are not in active torrents list
-    active_hashes = set(t['hash'] for t in torrents)
-    for movie in Movie.select().where(Movie.ignored == False):
-        if movie.torrent_hash not in active_hashes:
-            # Skip RSS movies - they don't have torrents in torrent client
-            if movie.state == 'rss':
-                continue
-
+    # Skip RSS movies - they don't have torrents in torrent client
+    active_hashes = set(torrent_map)
+    candidates = (Movie
+                  .select(*SYNC_MOVIE_COLUMNS)
+                  .where((Movie.ignored == False) &
+                         (Movie.status != 'orphaned') &
+                         ((Movie.state != 'rss') | (Movie.state.is_null()))))
+    orphaned = [m for m in candidates if m.torrent_hash not in active_hashes]
+    
+    if orphaned:
+        with db.atomic():
+            for chunk in chunked([m.id for m in orphaned], 500):
+                Movie.update(status='orphaned', progress=0.0, state='orphaned').where(Movie.id.in_(chunk)).execute()
+        
+        for movie in orphaned:
             # Movie is in DB but not in active torrents = orphaned
-            if movie.status != 'orphaned':
-                logger.info(f"Marking movie as orphaned: {movie.title} ({movie.torrent_hash})")
-                movie.status = 'orphaned'
-                movie.progress = 0.0
-                movie.state = 'orphaned'
-                movie.save()
+            logger.info(f"Marking movie as orphaned: {movie.title} ({movie.torrent_hash})")
+            movie.status = 'orphaned'
+            movie.progress = 0.0
+            movie.state = 'orphaned'
+            EVENTS.publish('movie', movie_summary(movie))
+
+def _write_movie_changes(dirty):
+    """
+    Queues {movie: [changed fields]} on the write queue, which coalesces
+    them with pending updates of the same rows and commits them in batched
+    UPDATEs (one per set of changed columns).
+    """
+    for movie, fields in dirty.items():
+        WRITES.update(Movie, movie.id, **{f: getattr(movie, f) for f in fields})
+
+def _handle_download_completed(movie, t):
+    """
+    Runs after a movie's torrent finished downloading: sends the Telegram
+    notification and triggers auto-copy for RSS feeds / manual search tags.
+    """
+    logger.info(f"Movie '{movie.title}' download completed, checking auto-copy...")
+
+    # Notify Telegram: Download Complete
+    settings = load_settings()
+    if settings.get('telegram_notify_on_download_complete', True):
+        send_telegram_notification(f"✅ <b>Download Complete</b>\n\n🎬 {movie.title} ({movie.year})\n💾 Ready to move.")
+
+    #  Check if this movie came from RSS with auto_copy enabled
+    settings = load_settings()
+    rss_feeds = settings.get('rss_feeds', [])
+    auto_copy_manual = settings.get('auto_copy_manual_search', False)
+
+    # Match by label/tag
+    torrent_tags = t.get('tags', '')
+    torrent_category = t.get('category', '')
+
+    # DEBUG: Verify tags are now available
+    logger.info(f"DEBUG: Torrent tags for '{movie.title}': '{torrent_tags}'")
+    logger.info(f"DEBUG: Torrent category for '{movie.title}': '{torrent_category}'")
+    logger.info(f"DEBUG: Number of RSS feeds configured: {len(rss_feeds)}")
+    logger.info(f"DEBUG: Auto-copy manual search enabled: {auto_copy_manual}")
+
+    # First, check RSS feeds
+    rss_matched = False
+    for feed in rss_feeds:
+        feed_label = feed.get('label', '')
+        feed_auto_copy = feed.get('auto_copy', False)
+        logger.info(f"DEBUG: Checking RSS feed '{feed.get('name')}' - label: '{feed_label}', auto_copy: {feed_auto_copy}")
+
+        if feed_label and feed_label in torrent_tags:
+            logger.info(f"DEBUG: Label '{feed_label}' found in torrent tags!")
+            if feed.get('auto_copy', False):
+                logger.info(f"Auto-copying '{movie.title}' from RSS feed '{feed.get('name')}'")
+                try:
+                    queue_copy(t['hash'], priority=PRIORITY_AUTO, source='auto')
+                    rss_matched = True
+                except Exception as e:
+                    logger.error(f"Auto-copy failed for '{movie.title}': {e}")
+            else:
+                logger.info(f"DEBUG: auto_copy is disabled for this feed")
+            break
+        else:
+            logger.info(f"DEBUG: Label '{feed_label}' NOT found in tags '{torrent_tags}'")
+
+    # If not matched by RSS, check manual search tag
+    if not rss_matched:
+        if auto_copy_manual and MANUAL_SEARCH_TAG in torrent_tags:
+            logger.info(f"Auto-copying '{movie.title}' from manual search")
+            try:
+                queue_copy(t['hash'], priority=PRIORITY_AUTO, source='auto')
+            except Exception as e:
+                logger.error(f"Auto-copy failed for '{movie.title}': {e}")
+        else:
+            logger.info(f"DEBUG: No auto-copy match found (RSS or manual search)")
+
+    logger.info(f"DEBUG: Auto-copy check completed for '{movie.title}'")
+
+@db_scoped
+def enrich_movie(torrent_hash, torrent_name):
+    """
+    Enrichment worker job: fills a placeholder Movie row with complete TMDB
+    metadata, IMDb rating and images. Returns True if TMDB found the movie.
+    """
+    movie = Movie.get_or_none(Movie.torrent_hash == torrent_hash)
+    if not movie or movie.metadata_updated_at:
+        # Deleted meanwhile, or already filled (e.g. by the RSS auto-download path)
+        return bool(movie)
+    
+    settings = load_settings()
+    api_key = settings.get('tmdb_api_key')
+    if not api_key:
+        return False
+    
+    title, year = clean_torrent_name(torrent_name)
+    metadata = fetch_complete_movie_metadata(title, year, api_key)
+    if not metadata:
+        _record_unresolved(torrent_hash, torrent_name)
+        return False
+    
+    UnresolvedTorrent.delete().where(UnresolvedTorrent.torrent_hash == torrent_hash).execute()
+    
+    # Download Images
+    poster_local = None
+    backdrop_local = None
+    if metadata.get('poster_path'):
+        poster_url = image_url(metadata.get('poster_path'), 'w500')
+        poster_local = download_image(poster_url, f"{torrent_hash}_poster.jpg")
+        
+    if metadata.get('backdrop_path'):
+        backdrop_url = image_url(metadata.get('backdrop_path'), 'w1280')
+        backdrop_local = download_image(backdrop_url, f"{torrent_hash}_backdrop.jpg")
+    
+    Movie.update(
+        title=metadata.get('title', title),
+        year=metadata.get('year', year),
+        poster_path=poster_local,
+        backdrop_path=backdrop_local,
+        overview=metadata.get('overview'),
+        runtime=metadata.get('runtime'),
+        genres=metadata.get('genres'), # Already JSON string from fetch_complete_movie_metadata
+        cast=metadata.get('cast'), # Already JSON string
+        crew=metadata.get('crew'), # Already JSON string
+        vote_average=metadata.get('vote_average'),
+        vote_count=metadata.get('vote_count'),
+        imdb_id=metadata.get('imdb_id'),
+        imdb_rating=metadata.get('imdb_rating'),
+        imdb_votes=metadata.get('imdb_votes'),
+        tmdb_id=metadata.get('tmdb_id'),  # Save TMDB ID for multi-language search
+        metadata_updated_at=datetime.now()
+    ).where(Movie.torrent_hash == torrent_hash).execute()
+    
+    movie = Movie.get_or_none(Movie.torrent_hash == torrent_hash)
+    if movie:
+        EVENTS.publish('movie', movie_summary(movie))
+    
+    # Notify Telegram: New Movie Found
+    if settings.get('telegram_notify_on_new_movie', True):
+        send_telegram_notification(f"🆕 <b>New Movie Found</b>\n\n🎬 {metadata.get('title', title)} ({metadata.get('year', year)})\n📥 Added to Dashboard.")
+    
+    return True
+
+def _record_unresolved(torrent_hash, torrent_name):
+    """
+    Remembers a torrent TMDB could not match and schedules the next lookup
+    with exponential backoff (15 min, 30 min, 1 h ... capped at 24 h).
+    """
+    entry = UnresolvedTorrent.get_or_none(UnresolvedTorrent.torrent_hash == torrent_hash)
+    attempts = (entry.attempts if entry else 0) + 1
+    delay = min(UNRESOLVED_BACKOFF_BASE * (2 ** (attempts - 1)), UNRESOLVED_BACKOFF_MAX)
+    now = datetime.now()
+    
+    UnresolvedTorrent.insert(
+        torrent_hash=torrent_hash,
+        torrent_name=torrent_name,
+        attempts=attempts,
+        last_attempt=now,
+        next_attempt=now + timedelta(seconds=delay)
+    ).on_conflict_replace().execute()
+    
+    logger.info(f"No TMDB match for: {torrent_name} (attempt {attempts}, next retry in {delay // 60} min)")
+
+def is_unresolved_backoff(torrent_hash):
+    """True while a torrent TMDB could not match is still inside its backoff window."""
+    return UnresolvedTorrent.select().where(
+        (UnresolvedTorrent.torrent_hash == torrent_hash) &
+        (UnresolvedTorrent.next_attempt > datetime.now())
+    ).exists()
+
+def get_unresolved_torrents():
+    """
+    Returns torrents TMDB could not match, with their retry schedule.
+    """
+    result = []
+    for u in UnresolvedTorrent.select().order_by(UnresolvedTorrent.next_attempt):
+        result.append({
+            "torrent_hash": u.torrent_hash,
+            "torrent_name": u.torrent_name,
+            "attempts": u.attempts,
+            "last_attempt": u.last_attempt.isoformat() if u.last_attempt else None,
+            "next_attempt": u.next_attempt.isoformat() if u.next_attempt else None
+        })
+    return result
+
+def retry_unresolved(torrent_hash):
+    """
+    Manual retry: clears the backoff window and queues a new lookup right away.
+    """
+    entry = UnresolvedTorrent.get_or_none(UnresolvedTorrent.torrent_hash == torrent_hash)
+    if not entry:
+        return False
+    
+    entry.next_attempt = datetime.now()
+    entry.save()
+    ENRICHMENT.enqueue(entry.torrent_hash, entry.torrent_name)
+    logger.info(f"Manual metadata retry queued for: {entry.torrent_name}")
+    return True
+
+def enqueue_missing_metadata():
+    """
+    Re-queues placeholder rows left without metadata (e.g. by a restart),
+    skipping torrents still inside their unresolved backoff window.
+    """
+    in_backoff = (UnresolvedTorrent
+                  .select(UnresolvedTorrent.torrent_hash)
+                  .where(UnresolvedTorrent.next_attempt > datetime.now()))
+    placeholders = (Movie
+                    .select(Movie.torrent_hash, Movie.torrent_name)
+                    .where(Movie.metadata_updated_at.is_null() &
+                           (Movie.ignored == False) &
+                           Movie.torrent_name.is_null(False) &
+                           Movie.torrent_hash.not_in(in_backoff)))
+    count = 0
+    for m in placeholders:
+        if ENRICHMENT.enqueue(m.torrent_hash, m.torrent_name):
+            count += 1
+    if count:
+        logger.info(f"Queued {count} movies for metadata enrichment")
+    return count
+
+# Columns movie_summary reads; list queries select only these (no cast/crew JSON)
+MOVIE_SUMMARY_COLUMNS = (
+    Movie.id, Movie.torrent_hash, Movie.title, Movie.year, Movie.poster_path,
+    Movie.backdrop_path, Movie.overview, Movie.status, Movie.progress, Movie.state
+)
+
+def movie_summary(m):
+    """
+    Dashboard card fields for a Movie row (shared by /api/movies and the event stream).
+    m can be a Movie or a namedtuple row selected with MOVIE_SUMMARY_COLUMNS.
+    """
+    return {
+        "title": m.title,
+        "year": m.year,
+        "poster_url": m.poster_path,
+        "backdrop_url": m.backdrop_path,
+        "overview": m.overview,
+        "torrent_hash": m.torrent_hash,
+        "status": m.status,
+        "progress": m.progress,
+        "state": m.state
+    }
+
+@db_scoped
+def push_snapshot_changes(changed, removed, full_update):
+    """
+    Snapshot listener: forwards torrent diffs to the event stream and, while
+    someone is listening, re-syncs movies so status transitions are pushed too.
+    """
+    if not EVENTS.has_subscribers() or not SNAPSHOT.is_ready():
+        return
+
+    EVENTS.publish('torrents', {"changed": changed, "removed": removed, "full": full_update})
+
+    api_key = load_settings().get('tmdb_api_key')
+    if api_key:
+        sync_movies(get_active_torrents(None), api_key)
 
 def get_movie_data(torrents, api_key):
     """
@@ -589,7 +796,13 @@ def get_movie_data(torrents, api_key):
     movies = []
     base_dir = os.path.join(os.path.dirname(__file__), 'static')
     
-    for m in Movie.select().where((Movie.ignored == False) & ((Movie.watchlist == False) | (Movie.watchlist.is_null()))).order_by(Movie.added_at.desc()):
+    query = (Movie
+             .select(*MOVIE_SUMMARY_COLUMNS)
+             .where((Movie.ignored == False) & ((Movie.watchlist == False) | (Movie.watchlist.is_null())))
+             .order_by(Movie.added_at.desc())
+             .namedtuples())
+    
+    for m in query:
         # Check if poster file exists, if not try to re-download
         if m.poster_path:
             poster_full_path = os.path.join(base_dir, m.poster_path)
@@ -597,40 +810,28 @@ def get_movie_data(torrents, api_key):
                 logger.warning(f"Poster missing for {m.title}, attempting re-download")
                 # Try to get TMDB data and re-download
                 try:
-                    search_url = "https://api.themoviedb.org/3/search/movie"
-                    params = {"api_key": api_key, "query": m.title, "language": get_language(), "year": m.year}
-                    res = requests.get(search_url, params=params, timeout=5)
-                    data = res.json()
+                    _, data = TMDB.search_movie(m.title, api_key, language=get_language(), year=m.year)
                     
                     if data.get('results'):
                         result = data['results'][0]
                         if result.get('poster_path'):
-                            poster_url = f"https://image.tmdb.org/t/p/w500{result.get('poster_path')}"
+                            poster_url = image_url(result.get('poster_path'), 'w500')
                             new_poster = download_image(poster_url, f"{m.torrent_hash}_poster.jpg", force=True)
                             if new_poster:
-                                m.poster_path = new_poster
-                                m.save()
+                                WRITES.update(Movie, m.id, poster_path=new_poster)
+                                m = m._replace(poster_path=new_poster)
                 except Exception as e:
                     logger.error(f"Error re-downloading poster for {m.title}: {e}")
         
-        movies.append({
-            "title": m.title,
-            "year": m.year,
-            "poster_url": m.poster_path,
-            "backdrop_url": m.backdrop_path,
-            "overview": m.overview,
-            "torrent_hash": m.torrent_hash,
-            "status": m.status,
-            "progress": m.progress,
-            "state": m.state
-        })
+        movies.append(movie_summary(m))
         
     # Identify ignored series from active torrents
-    ignored_series = []
-    for t in torrents:
-        # If not in DB and is_series -> Ignored
-        if is_series(t['name']) and not Movie.select().where(Movie.torrent_hash == t['hash']).exists():
-            ignored_series.append(t['name'])
+    series = [t for t in torrents if is_series(t['name'])]
+    known = set()
+    for chunk in chunked([t['hash'] for t in series], 500):
+        known.update(h for (h,) in Movie.select(Movie.torrent_hash).where(Movie.torrent_hash.in_(chunk)).tuples())
+    # If not in DB and is_series -> Ignored
+    ignored_series = [t['name'] for t in series if t['hash'] not in known]
             
     return {"movies": movies, "ignored_series": ignored_series}
 
@@ -644,49 +845,16 @@ def identify_movie(torrent_hash, tmdb_id, api_key):
         return False, "Movie not found in dashboard"
         
     try:
-        # Fetch complete details from TMDB
-        url = f"https://api.themoviedb.org/3/movie/{tmdb_id}"
-        params = {"api_key": api_key, "language": get_language()}
-        res = requests.get(url, params=params, timeout=5)
+        # Fetch complete details, credits (cast & crew) and external IDs (IMDb) in one request
+        status_code, details = TMDB.movie(tmdb_id, api_key, language=get_language(), append=['credits', 'external_ids'])
         
-        if res.status_code != 200:
+        if status_code != 200:
             return False, "TMDB ID not found"
-            
-        details = res.json()
         
-        # Get credits (cast & crew)
-        credits_url = f"https://api.themoviedb.org/3/movie/{tmdb_id}/credits"
-        credits_res = requests.get(credits_url, params={"api_key": api_key}, timeout=5)
-        credits = credits_res.json()
+        credits = details.get('credits') or {}
+        external_ids = details.get('external_ids') or {}
         
-        # Get external IDs (IMDb)
-        external_ids_url = f"https://api.themoviedb.org/3/movie/{tmdb_id}/external_ids"
-        external_ids_res = requests.get(external_ids_url, params={"api_key": api_key}, timeout=5)
-        external_ids = external_ids_res.json()
-        
-        # Process cast (top 10)
-        cast = []
-        for person in credits.get('cast', [])[:10]:
-            cast.append({
-                "name": person.get('name'),
-                "character": person.get('character'),
-                "profile_path": f"https://image.tmdb.org/t/p/w185{person.get('profile_path')}" if person.get('profile_path') else None
-            })
-        
-        # Process crew (key roles)
-        crew = []
-        key_jobs = ['Director', 'Writer', 'Screenplay', 'Producer']
-        seen_names = set()
-        for person in credits.get('crew', []):
-            if person.get('job') in key_jobs and person.get('name') not in seen_names:
-                crew.append({
-                    "name": person.get('name'),
-                    "job": person.get('job'),
-                    "profile_path": f"https://image.tmdb.org/t/p/w185{person.get('profile_path')}" if person.get('profile_path') else None
-                })
-                seen_names.add(person.get('name'))
-                if len(crew) >= 10:
-                    break
+        cast, crew = parse_credits(credits)
         
         # Get IMDb rating if available
         imdb_id = external_ids.get('imdb_id')
@@ -711,14 +879,15 @@ def identify_movie(torrent_hash, tmdb_id, api_key):
         
         # Update Images
         if details.get('poster_path'):
-            poster_url = f"https://image.tmdb.org/t/p/w500{details.get('poster_path')}"
+            poster_url = image_url(details.get('poster_path'), 'w500')
             movie.poster_path = download_image(poster_url, f"{torrent_hash}_poster.jpg", force=True)
             
         if details.get('backdrop_path'):
-            backdrop_url = f"https://image.tmdb.org/t/p/w1280{details.get('backdrop_path')}"
+            backdrop_url = image_url(details.get('backdrop_path'), 'w1280')
             movie.backdrop_path = download_image(backdrop_url, f"{torrent_hash}_backdrop.jpg", force=True)
             
         movie.save()
+        UnresolvedTorrent.delete().where(UnresolvedTorrent.torrent_hash == torrent_hash).execute()
         return True, "Movie identified successfully"
         
     except Exception as e:
@@ -757,9 +926,12 @@ def delete_movie(torrent_hash, ignore_movie=True):
     logger.info(f"Removing history for movie: {movie_title} ({torrent_hash})")
     try:
         from database import MoveHistory
+        query = MoveHistory.torrent_hash == movie.torrent_hash
         if movie.torrent_name:
-            deleted_count = MoveHistory.delete().where(MoveHistory.torrent_name == movie.torrent_name).execute()
-            logger.info(f"Deleted {deleted_count} history records for {movie_title}")
+            # Plus rows from before MoveHistory.torrent_hash that were never linked
+            query |= MoveHistory.torrent_hash.is_null() & (MoveHistory.torrent_name == movie.torrent_name)
+        deleted_count = MoveHistory.delete().where(query).execute()
+        logger.info(f"Deleted {deleted_count} history records for {movie_title}")
     except Exception as e:
         logger.error(f"Error removing history for {torrent_hash}: {e}")
     
@@ -806,7 +978,11 @@ def get_watchlist_movies():
     Returns:
         List of dicts with movie info and expiry data
     """
-    movies = Movie.select().where(Movie.watchlist == True).order_by(Movie.watchlist_expiry)
+    movies = (Movie
+              .select(Movie.torrent_hash, Movie.title, Movie.year, Movie.watchlist_expiry)
+              .where(Movie.watchlist == True)
+              .order_by(Movie.watchlist_expiry)
+              .namedtuples())
     
     result = []
     for m in movies:
@@ -898,19 +1074,11 @@ def get_movie_details(torrent_hash, api_key):
     Uses cached data from database when available, only queries TMDB if cache is empty.
     """
     settings = load_settings()
-    qb = get_qb_client(settings)
     
     try:
-        qb.auth_log_in()
-        torrents = qb.torrents_info(torrent_hashes=torrent_hash)
-        
-        # Fallback: If filter fails, try iterating all (robustness)
-        if not torrents:
-            all_torrents = qb.torrents_info()
-            for t in all_torrents:
-                if t.hash.lower() == torrent_hash.lower():
-                    torrents = [t]
-                    break
+        # Lookup is case-insensitive, so no need for a full-list fallback
+        torrent = SNAPSHOT.get_torrent(torrent_hash)
+        torrents = [torrent] if torrent else []
         
         if not torrents:
             # Try to get from DB first to show metadata even if torrent is gone
@@ -1065,7 +1233,7 @@ def get_movie_details(torrent_hash, api_key):
                         metadata = fetch_complete_movie_metadata(movie.title, movie.year, api_key, images_only=True)
                         if metadata and metadata.get('poster_path'):
                             # Use remote URL immediately
-                            poster_url = f"https://image.tmdb.org/t/p/w500{metadata.get('poster_path')}"
+                            poster_url = image_url(metadata.get('poster_path'), 'w500')
                             # Trigger background download
                             threading.Thread(
                                 target=download_image_background,
@@ -1087,7 +1255,7 @@ def get_movie_details(torrent_hash, api_key):
                         metadata = fetch_complete_movie_metadata(movie.title, movie.year, api_key, images_only=True)
                         if metadata and metadata.get('backdrop_path'):
                             # Use remote URL immediately
-                            backdrop_url = f"https://image.tmdb.org/t/p/w1280{metadata.get('backdrop_path')}"
+                            backdrop_url = image_url(metadata.get('backdrop_path'), 'w1280')
                             # Trigger background download
                             threading.Thread(
                                 target=download_image_background,
@@ -1124,11 +1292,11 @@ def get_movie_details(torrent_hash, api_key):
                 backdrop_local = None
                 
                 if metadata.get('poster_path'):
-                    poster_url = f"https://image.tmdb.org/t/p/w500{metadata.get('poster_path')}"
+                    poster_url = image_url(metadata.get('poster_path'), 'w500')
                     poster_local = download_image(poster_url, f"{torrent_hash}_poster.jpg")
                     
                 if metadata.get('backdrop_path'):
-                    backdrop_url = f"https://image.tmdb.org/t/p/w1280{metadata.get('backdrop_path')}"
+                    backdrop_url = image_url(metadata.get('backdrop_path'), 'w1280')
                     backdrop_local = download_image(backdrop_url, f"{torrent_hash}_backdrop.jpg")
                 
                 # Parse cast/crew from JSON strings
@@ -1200,43 +1368,11 @@ def get_movie_details(torrent_hash, api_key):
             status = movie.status  # Use status from database (e.g., 'new')
         else:
             # For regular torrents, calculate status from torrent client state and history
-            # Check DB for history
-            history = MoveHistory.select().where(MoveHistory.torrent_name == t.name).order_by(MoveHistory.timestamp.desc()).first()
-            status = 'pending'
-            
-            # 1. Check current state (Prioritize active downloading)
-            state = t.state
-            is_downloading = state in ['metaDL', 'allocating', 'queuedDL', 'downloading', 'forceDL', 'stalledDL', 'pausedDL']
-            
-            if is_downloading:
-                if state in ['metaDL', 'allocating', 'queuedDL']:
-                    status = 'new'
-                else:
-                    status = 'downloading'
-            else:
-                # 2. If not downloading, check history
-                if history:
-                    if history.status == 'success' or history.status == 'manual':
-                        status = 'moved' if history.status == 'success' else 'moved_manually'
-                        
-                        # Use the actual path from history if available
-                        if history.dest_path:
-                            dest_path = history.dest_path
-                        
-                        # Verify existence
-                        if os.path.exists(dest_path):
-                            pass # Status remains moved
-                        else:
-                            status = 'missing'
-                    elif history.status == 'skipped': status = 'skipped'
-                    elif history.status == 'error': status = 'error'
-                else:
-                    # 3. No history and not downloading -> Pending or Error
-                    if state in ['uploading', 'pausedUP', 'queuedUP', 'stalledUP', 'completed', 'checkingUP', 'checkingDL']:
-                        status = 'pending'
-                    elif state in ['error', 'missingFiles']:
-                        status = 'error'
+            status, history = resolve_statuses([t], settings)[t.hash]
             
+            # Use the actual path from history if available
+            if history and history.status in ('success', 'manual') and history.dest_path:
+                dest_path = history.dest_path
             
         # Check if copying
         if torrent_hash in COPY_PROGRESS:
@@ -1270,6 +1406,14 @@ def get_movie_details(torrent_hash, api_key):
 def get_copy_progress():
     return COPY_PROGRESS
 
+def _set_copy_progress(torrent_hash, progress):
+    COPY_PROGRESS[torrent_hash] = progress
+    EVENTS.publish('copy', {"hash": torrent_hash, "progress": progress})
+
+def _clear_copy_progress(torrent_hash):
+    if COPY_PROGRESS.pop(torrent_hash, None) is not None:
+        EVENTS.publish('copy', {"hash": torrent_hash, "progress": None})
+
 def stop_copy(torrent_hash):
     """
     Signals a copy operation to stop.
@@ -1280,123 +1424,165 @@ def stop_copy(torrent_hash):
         return True
     return False
 
-def copy_with_progress(src, dst, torrent_hash, speed_limit_mbps=0):
-    global COPY_PROGRESS, STOP_FLAGS
+def raise_if_stopped(torrent_hash):
+    """
+    Raises InterruptedError if the torrent's copy was stopped or its copy job
+    cancelled. Checked between import steps and per copied chunk, so a job
+    cancelled while resolving, planning or linking stops too.
+    """
+    if torrent_hash in STOP_FLAGS or COPY_QUEUE.is_cancelled(torrent_hash):
+        raise InterruptedError("Copy stopped by user")
+
+class TorrentCopyProgress:
+    """
+    Byte-accurate progress of one torrent import, shared by all the files it
+    copies (possibly in parallel) and published as COPY_PROGRESS[hash]:
+    percent, speed and ETA over the torrent's total bytes.
+    """
+
+    def __init__(self, torrent_hash, total_bytes):
+        self.torrent_hash = torrent_hash
+        self.total_bytes = total_bytes
+        self._lock = threading.Lock()
+        self._files = {} # {dst: bytes present (including resumed data)}
+        self._transferred = 0 # Bytes sent in this attempt (for speed/ETA)
+        self._start_time = time.time()
+        self._last_update = 0
+
+    def _progress(self, status):
+        copied = sum(self._files.values())
+        elapsed = time.time() - self._start_time
+        rate = self._transferred / elapsed if elapsed > 0 else 0 # bytes/s
+        remaining = max(0, self.total_bytes - copied)
+        return {
+            'percent': round(copied / self.total_bytes * 100, 1) if self.total_bytes else 0,
+            'speed': round(rate / 1024 / 1024, 2), # MB/s
+            'eta': int(remaining / rate) if rate > 0 else None, # seconds
+            'copied': copied,
+            'total': self.total_bytes,
+            'status': status
+        }
+
+    def start(self):
+        _set_copy_progress(self.torrent_hash, self._progress('copying'))
+
+    def update(self, dst, copied, nbytes=0):
+        """Records copied bytes of dst; publishes at most every 0.5s."""
+        with self._lock:
+            self._files[dst] = copied
+            self._transferred += nbytes
+            now = time.time()
+            if now - self._last_update <= 0.5:
+                return
+            self._last_update = now
+            progress = self._progress('copying')
+        _set_copy_progress(self.torrent_hash, progress)
+
+    def finish(self):
+        _set_copy_progress(self.torrent_hash, {'percent': 100, 'speed': 0, 'eta': 0, 'copied': self.total_bytes, 'total': self.total_bytes, 'status': 'done'})
+        # Clean up
+        time.sleep(2)
+        _clear_copy_progress(self.torrent_hash)
+
+    def stopped(self):
+        _clear_copy_progress(self.torrent_hash)
+        STOP_FLAGS.discard(self.torrent_hash)
+
+    def failed(self):
+        _set_copy_progress(self.torrent_hash, {'percent': 0, 'speed': 0, 'status': 'error'})
+
+def io_policy(settings):
+    """Copy I/O policy (preallocation, page cache, I/O priority) from settings."""
+    return IOPolicy(
+        preallocate=settings.get('copy_preallocate', True),
+        drop_cache=settings.get('copy_drop_cache', True),
+        idle_priority=settings.get('copy_idle_io', False)
+    )
+
+def copy_with_progress(src, dst, torrent_hash, speed_limit_mbps=0, hasher=None, progress=None, policy=None):
+    """
+    Copies one file, reporting to progress (a TorrentCopyProgress shared by
+    the torrent's files). Without it, the file is tracked on its own.
+    """
+    own_progress = progress is None
+    if own_progress:
+        progress = TorrentCopyProgress(torrent_hash, os.path.getsize(src))
+        progress.start()
     
-    file_size = os.path.getsize(src)
-    copied = 0
-    chunk_size = 1024 * 1024 # 1MB chunks
-    start_time = time.time()
-    last_update = start_time
+    # Speed Limiting: all copies draw from the shared BANDWIDTH bucket
+    BANDWIDTH.set_rate_mbps(speed_limit_mbps)
     
-    COPY_PROGRESS[torrent_hash] = {
-        'percent': 0,
-        'speed': 0,
-        'status': 'copying'
-    }
+    def on_chunk(copied, nbytes):
+        # Check for stop signal
+        raise_if_stopped(torrent_hash)
+        
+        progress.update(dst, copied, nbytes)
+        BANDWIDTH.acquire(nbytes)
     
+    job = (torrent_hash, dst)
+    BANDWIDTH.register(job)
     try:
-        with open(src, 'rb') as fsrc, open(dst, 'wb') as fdst:
-            while True:
-                # Check for stop signal
-                if torrent_hash in STOP_FLAGS:
-                    logger.info(f"Copy stopped by user for {torrent_hash}")
-                    raise InterruptedError("Copy stopped by user")
-
-                chunk = fsrc.read(chunk_size)
-                if not chunk:
-                    break
-                
-                fdst.write(chunk)
-                copied += len(chunk)
-                
-                # Calculate Progress
-                percent = (copied / file_size) * 100
-                
-                # Calculate Speed & Limit
-                current_time = time.time()
-                elapsed = current_time - start_time
-                if elapsed > 0:
-                    speed = (copied / 1024 / 1024) / elapsed # MB/s
-                else:
-                    speed = 0
-                
-                # Update State (every 0.5s)
-                if current_time - last_update > 0.5:
-                    COPY_PROGRESS[torrent_hash] = {
-                        'percent': round(percent, 1),
-                        'speed': round(speed, 2),
-                        'status': 'copying'
-                    }
-                    last_update = current_time
-                
-                # Speed Limiting (Distributed)
-                if speed_limit_mbps > 0:
-                    # Calculate active copies to distribute speed
-                    # Use list() to avoid runtime error if dict changes during iteration
-                    active_copies = sum(1 for k, v in list(COPY_PROGRESS.items()) if v.get('status') == 'copying')
-                    active_copies = max(1, active_copies) # Avoid division by zero
-                    
-                    effective_limit = speed_limit_mbps / active_copies
-                    
-                    expected_time = (copied / 1024 / 1024) / effective_limit
-                    if expected_time > elapsed:
-                        sleep_time = expected_time - elapsed
-                        time.sleep(sleep_time)
-                        
-        # Final Update
-        COPY_PROGRESS[torrent_hash] = {
-            'percent': 100,
-            'speed': 0,
-            'status': 'done'
-        }
-        # Clean up
-        time.sleep(2)
-        if torrent_hash in COPY_PROGRESS:
-            del COPY_PROGRESS[torrent_hash]
+        copy_file(src, dst, on_chunk=on_chunk, max_chunk=BANDWIDTH.chunk_hint, hasher=hasher,
+                  io_policy=policy or io_policy(load_settings()))
+        progress.update(dst, os.path.getsize(dst))
+        if own_progress:
+            progress.finish()
             
     except InterruptedError:
-        # Cleanup partial file
-        logger.info(f"Cleaning up partial file: {dst}")
-        try:
-            os.remove(dst)
-            # Try to remove folder if empty
-            parent_dir = os.path.dirname(dst)
-            if not os.listdir(parent_dir):
-                os.rmdir(parent_dir)
-        except Exception as cleanup_err:
-            logger.error(f"Error cleaning up: {cleanup_err}")
-            
-        if torrent_hash in COPY_PROGRESS:
-            del COPY_PROGRESS[torrent_hash]
-        if torrent_hash in STOP_FLAGS:
-            STOP_FLAGS.remove(torrent_hash)
+        # The .part file and its checkpoint stay, so the next attempt resumes
+        logger.info(f"Copy stopped, partial file kept for resume: {dst}")
+        if own_progress:
+            progress.stopped()
+        # Let the caller know dst is incomplete (no 'success' history entry)
+        raise
             
     except Exception as e:
         logger.error(f"Error copying file: {e}")
-        COPY_PROGRESS[torrent_hash] = {
-            'percent': 0,
-            'speed': 0,
-            'status': 'error'
-        }
-        # Don't delete file on error, maybe user wants to resume? 
-        # Actually for now let's leave it.
+        if own_progress:
+            progress.failed()
+        # Partial data stays in the checkpointed .part file for the next retry
         raise e
+    finally:
+        BANDWIDTH.unregister(job)
+
+def import_files_parallel(plan, torrent_hash, settings):
+    """
+    Imports a directory torrent's files [(src, dst), ...] with up to
+    parallel_file_copies at once, under one progress entry for the torrent.
+    Returns [(dst, method, checksum)]. If any file fails, the first error is
+    raised after the other files have finished (or stopped).
+    """
+    from concurrent.futures import ThreadPoolExecutor
+    
+    progress = TorrentCopyProgress(torrent_hash, sum(os.path.getsize(src) for src, _ in plan))
+    progress.start()
+    workers = max(1, int(settings.get('parallel_file_copies', 2)))
+    
+    results = []
+    errors = []
+    with ThreadPoolExecutor(max_workers=min(workers, len(plan)), thread_name_prefix="file-copy") as pool:
+        futures = [(dst, pool.submit(import_file, src, dst, torrent_hash, settings, progress)) for src, dst in plan]
+        for dst, future in futures:
+            try:
+                method, checksum = future.result()
+                results.append((dst, method, checksum))
+            except Exception as e:
+                errors.append(e)
+    
+    if errors:
+        # A user stop wins over other errors: nothing to report as failed
+        stop = next((e for e in errors if isinstance(e, InterruptedError)), None)
+        if stop:
+            progress.stopped()
+            raise stop
+        progress.failed()
+        raise errors[0]
+    
+    progress.finish()
+    return results
 
 def load_settings():
-    if not os.path.exists(SETTINGS_FILE):
-        save_settings(DEFAULT_SETTINGS)
-        return DEFAULT_SETTINGS
-    try:
-        with open(SETTINGS_FILE, 'r') as f:
-            settings = json.load(f)
-            # Merge with defaults to ensure all keys exist
-            for key, val in DEFAULT_SETTINGS.items():
-                if key not in settings:
-                    settings[key] = val
-            return settings
-    except:
-        return DEFAULT_SETTINGS
+    return SETTINGS.get()
 
 def get_language():
     """
@@ -1404,12 +1590,23 @@ def get_language():
     Returns the language code (e.g., 'es-ES', 'en-US') from settings.
     Defaults to 'es-ES' for backwards compatibility.
     """
-    settings = load_settings()
-    return settings.get('language', 'es-ES')
+    return SETTINGS.value('language', 'es-ES')
 
 def save_settings(settings):
-    with open(SETTINGS_FILE, 'w') as f:
-        json.dump(settings, f, indent=4)
+    SETTINGS.save(settings)
+
+def on_settings_changed(old, new):
+    """
+    Settings subscriber: applies a new copy speed limit to running copies and
+    reconnects to qBittorrent when it was re-pointed.
+    """
+    if old.get('copy_speed_limit') != new.get('copy_speed_limit'):
+        BANDWIDTH.set_rate_mbps(new.get('copy_speed_limit', 10))
+    
+    if any(old.get(k) != new.get(k) for k in QB_SETTINGS_KEYS):
+        logger.info("Torrent client settings changed, resyncing torrent list")
+        QB_CLIENTS.invalidate()
+        SNAPSHOT.reset()
 
 def get_prowlarr_stats(indexer_config):
     """
@@ -1535,18 +1732,15 @@ def get_movie_titles_in_languages(tmdb_id, languages, api_key):
     try:
         for lang in languages:
             try:
-                url = f"https://api.themoviedb.org/3/movie/{tmdb_id}"
-                params = {"api_key": api_key, "language": lang}
-                response = requests.get(url, params=params, timeout=5)
+                status_code, data = TMDB.movie(tmdb_id, api_key, language=lang)
                 
-                if response.status_code == 200:
-                    data = response.json()
+                if status_code == 200:
                     title = data.get('title')
                     if title:
                         titles[lang] = title
                         logger.info(f"Fetched title for {lang}: '{title}'")
                 else:
-                    logger.warning(f"Failed to fetch title for {lang}, status: {response.status_code}")
+                    logger.warning(f"Failed to fetch title for {lang}, status: {status_code}")
                     
             except Exception as e:
                 logger.error(f"Error fetching title for language {lang}: {e}")
@@ -1563,108 +1757,49 @@ def get_movie_titles_in_languages(tmdb_id, languages, api_key):
         return {}
 
 
-def find_file_in_path(base_path, filename):
-    """
-    Recursively search for a file in base_path.
-    Returns the full path if found, else None.
-    """
-    if not base_path or not os.path.exists(base_path):
-        return None
-
-    # 1. Try direct path first (fastest)
-    direct_path = os.path.join(base_path, filename)
-    if os.path.exists(direct_path):
-        return direct_path
-        
-    # 2. Recursive search
-    for root, dirs, files in os.walk(base_path):
-        if filename in files:
-            return os.path.join(root, filename)
-            
-    return None
+def get_torrent_files(torrent_hash, settings):
+    """Relative file names of a torrent, as reported by qBittorrent."""
+    files = QB_CLIENTS.request(settings, lambda qb: qb.torrents_files(torrent_hash=torrent_hash))
+    return [f['name'] for f in files]
 
 def get_qb_client(settings):
-    return qbittorrentapi.Client(
-        host=settings.get('qb_host'),
-        port=settings.get('qb_port'),
-        username=settings.get('qb_user'),
-        password=settings.get('qb_pass')
-    )
+    """
+    Returns the shared, already authenticated torrent client.
+    It is only rebuilt when the qb_* settings change.
+    """
+    return QB_CLIENTS.get(settings)
 
+@db_scoped
 def process_torrents(config_ignored=None):
     # We ignore the passed config now, use settings.json
     settings = load_settings()
     logger.info("Starting torrent check...")
     
-    try:
-        qb = get_qb_client(settings)
-        qb.auth_log_in()
-    except Exception as e:
-        logger.error(f"Failed to connect to torrent client: {e}")
+    # Get completed torrents from the shared snapshot
+    torrents = SNAPSHOT.get_torrents(status_filter='completed')
+    if not SNAPSHOT.is_ready():
+        logger.error(f"Failed to connect to torrent client: {SNAPSHOT.last_error}")
         return
-
-    # Get completed torrents
-    torrents = qb.torrents_info(status_filter='completed')
     
     for torrent in torrents:
         # Check if already processed
-        if MoveHistory.select().where(MoveHistory.torrent_name == torrent.name, MoveHistory.status == 'success').exists():
+        if history_for(torrent.hash, status='success', torrent_name=torrent.name):
             continue
 
-        process_single_torrent(qb, torrent, settings)
+        COPY_QUEUE.enqueue(torrent.hash, torrent.name, priority=PRIORITY_AUTO, source='auto')
 
 def get_active_torrents(config_ignored=None):
     settings = load_settings()
     try:
-        qb = get_qb_client(settings)
-        qb.auth_log_in()
+        # Get all torrents from the shared snapshot
+        torrents = SNAPSHOT.get_torrents()
         
-        # Get all torrents
-        torrents = qb.torrents_info()
+        # Status for every torrent in one pass (single grouped history query)
+        statuses = resolve_statuses(torrents, settings)
         
         results = []
         for t in torrents:
-            # Check DB status
-            history = MoveHistory.select().where(MoveHistory.torrent_name == t.name).order_by(MoveHistory.timestamp.desc()).first()
-            
-            status = 'pending'
-            if history:
-                if history.status == 'success' or history.status == 'manual':
-                    # Verify existence
-                    local_dest = settings.get('local_dest_path')
-                    status = 'moved' if history.status == 'success' else 'moved_manually'
-                    
-                    if local_dest and 'content_path' in t:
-                         normalized_path = t['content_path'].replace('\\', '/')
-                         item_name = os.path.basename(normalized_path.rstrip('/'))
-                         match = re.search(r"(.+?)\s\((\d{4})\)", item_name)
-                         
-                         if match:
-                             title = match.group(1).strip()
-                             year = match.group(2).strip()
-                             folder_name = f"{title} ({year})"
-                             dest_path = os.path.join(local_dest, folder_name)
-                             
-                             if not os.path.exists(dest_path):
-                                 status = 'missing'
-                         # If match fails, we assume moved (fallback)
-                elif history.status == 'skipped':
-                    status = 'skipped'
-                elif history.status == 'error':
-                    status = 'error'
-            else:
-                # No history, derive from state
-                state = t.state
-                if state in ['metaDL', 'allocating', 'queuedDL']:
-                    status = 'new'
-                elif state in ['downloading', 'forceDL', 'stalledDL', 'pausedDL']:
-                    status = 'downloading'
-                elif state in ['uploading', 'pausedUP', 'queuedUP', 'stalledUP', 'completed', 'checkingUP', 'checkingDL']:
-                    status = 'pending'
-                elif state in ['error', 'missingFiles']:
-                    status = 'error'
-                else:
-                    status = 'pending' # Default fallback
+            status, history = statuses[t.hash]
             
             results.append({
                 'hash': t.hash,
@@ -1687,39 +1822,114 @@ def get_active_torrents(config_ignored=None):
         logger.error(f"Error getting torrents: {e}")
         return []
 
-def manual_move(torrent_hash, config_ignored=None):
-    settings = load_settings()
+def queue_copy(torrent_hash, priority=PRIORITY_MANUAL, source='manual'):
+    """Adds a copy job for the torrent to COPY_QUEUE (no-op if one is already active)."""
     try:
-        qb = get_qb_client(settings)
-        qb.auth_log_in()
-        
-        torrents = qb.torrents_info(torrent_hashes=torrent_hash)
-        if not torrents:
+        torrent = SNAPSHOT.get_torrent(torrent_hash)
+        if not torrent:
             return {"success": False, "message": "Torrent not found"}
-            
-        torrent = torrents[0]
-        process_single_torrent(qb, torrent, settings)
-        return {"success": True, "message": f"Started processing {torrent.name}"}
+        
+        if COPY_QUEUE.enqueue(torrent.hash, torrent.name, priority=priority, source=source):
+            return {"success": True, "message": f"Queued {torrent.name}"}
+        return {"success": True, "message": f"{torrent.name} is already queued"}
     except Exception as e:
         return {"success": False, "message": str(e)}
 
+def manual_move(torrent_hash, config_ignored=None):
+    return queue_copy(torrent_hash, priority=PRIORITY_MANUAL, source='manual')
+
+def run_copy_job(torrent_hash):
+    """
+    COPY_QUEUE worker handler: imports the torrent into the library.
+    Returns (success, message) as reported by process_single_torrent.
+    Raises RetryLater while the torrent list is stale or lacks the torrent.
+    """
+    if SNAPSHOT.is_stale():
+        raise RetryLater("Waiting for the torrent client", counted=False)
+    torrent = SNAPSHOT.get_torrent(torrent_hash)
+    if not torrent:
+        raise RetryLater("Torrent not found")
+    
+    try:
+        success, message = process_single_torrent(torrent, load_settings())
+    finally:
+        STOP_FLAGS.discard(torrent_hash)
+    
+    # The job's status is published next: commit its history entry first
+    WRITES.flush(timeout=FLUSH_TIMEOUT)
+    return success, message
+
 def mark_as_moved(torrent_hash, config_ignored=None):
-    settings = load_settings()
     try:
-        qb = get_qb_client(settings)
-        qb.auth_log_in()
-        
-        torrents = qb.torrents_info(torrent_hashes=torrent_hash)
-        if not torrents:
+        torrent = SNAPSHOT.get_torrent(torrent_hash)
+        if not torrent:
              return {"success": False, "message": "Torrent not found"}
         
-        torrent = torrents[0]
-        MoveHistory.create(torrent_name=torrent.name, status='manual', message="Manually marked as moved", source_path="", dest_path="")
+        MoveHistory.create(torrent_hash=torrent.hash, torrent_name=torrent.name, status='manual', message="Manually marked as moved", source_path="", dest_path="")
         return {"success": True, "message": "Marked as moved"}
     except Exception as e:
         return {"success": False, "message": str(e)}
 
-def process_single_torrent(qb, torrent, settings):
+def import_file(src, dst, torrent_hash, settings, progress=None):
+    """
+    Puts src into the library as dst: hardlink/reflink when the import mode
+    and filesystem allow it, byte copy otherwise.
+    Returns (method, checksum): method is 'hardlink', 'reflink' or 'copy';
+    checksum ('algorithm:hexdigest' of the source bytes) only for copies.
+    """
+    raise_if_stopped(torrent_hash)
+    method = try_link(settings.get('import_mode', 'auto'), src, dst)
+    if method:
+        logger.info(f"Linked ({method}) {src} to {dst}")
+        discard_partial(dst)
+        if progress:
+            progress.update(dst, os.path.getsize(dst))
+        return method, None
+
+    logger.info(f"Copying {src} to {dst}")
+    hasher = new_hasher()
+    policy = io_policy(settings)
+    copy_with_progress(src, dst, torrent_hash, settings.get('copy_speed_limit', 10), hasher=hasher, progress=progress, policy=policy)
+    checksum = format_checksum(hasher)
+    
+    if settings.get('verify_after_copy', False):
+        logger.info(f"Verifying {dst}")
+        if not verify_checksum(dst, checksum, policy):
+            # Don't leave a corrupt file in the library: the next attempt
+            # would find it and skip the import as "Destination exists"
+            os.remove(dst)
+            discard_partial(dst)
+            raise IOError(f"Checksum mismatch after copy: {dst}")
+    return 'copy', checksum
+
+def verify_import(history_id):
+    """
+    Re-reads the library files of a copy recorded in MoveHistory and compares
+    them with the checksums computed while copying. The source is not read.
+    """
+    history = MoveHistory.get_or_none(MoveHistory.id == history_id)
+    if not history:
+        return {"success": False, "message": "History entry not found"}
+    if not history.checksum:
+        return {"success": False, "message": "No checksum recorded (linked import or copied before checksums)"}
+    
+    results = {}
+    for path, expected in json.loads(history.checksum).items():
+        try:
+            results[path] = 'ok' if verify_checksum(path, expected) else 'mismatch'
+        except OSError as e:
+            results[path] = f"error: {e}"
+    
+    ok = all(r == 'ok' for r in results.values())
+    if not ok:
+        logger.warning(f"Verification failed for {history.torrent_name}: {results}")
+    return {"success": True, "verified": ok, "files": results}
+
+def process_single_torrent(torrent, settings):
+    """
+    Imports one torrent into the library and records the outcome in
+    MoveHistory. Returns (success, message); skips count as success.
+    """
     logger.info(f"Processing: {torrent.name}")
     
     # 2. Check Content Path
@@ -1730,23 +1940,23 @@ def process_single_torrent(qb, torrent, settings):
     # Determine Source Path
     local_source = settings.get('local_source_path')
     
-    if not local_source:
-        logger.error("No local_source_path configured in settings.")
-        return
+    if not local_source and not settings.get('path_mappings'):
+        logger.error("No local_source_path or path_mappings configured in settings.")
+        return False, "No local_source_path or path_mappings configured"
 
-    source_path = find_file_in_path(local_source, item_name)
+    source_path = resolve_source(torrent, settings, item_name, get_files=lambda: get_torrent_files(torrent.hash, settings))
     
     if not source_path:
             logger.warning(f"Could not find {item_name} in {local_source}")
-            MoveHistory.create(torrent_name=torrent.name, status='error', message=f"File not found in {local_source}", source_path="", dest_path="")
-            return
+            WRITES.insert(MoveHistory, torrent_hash=torrent.hash, torrent_name=torrent.name, status='error', message=f"File not found in {local_source}", source_path="", dest_path="")
+            return False, f"File not found in {local_source}"
 
     # 3. Parse Name (Movie vs Series) - Allow space before year to be optional
     match = re.search(r"(.+?)\s*\((\d{4})\)", item_name)
     if not match:
         logger.info(f"Skipping {torrent.name}: Does not match 'Title (Year)' pattern.")
-        MoveHistory.create(torrent_name=torrent.name, status='skipped', message="Invalid name format", source_path=source_path, dest_path="")
-        return
+        WRITES.insert(MoveHistory, torrent_hash=torrent.hash, torrent_name=torrent.name, status='skipped', message="Invalid name format", source_path=source_path, dest_path="")
+        return True, "Invalid name format"
 
     title = match.group(1).strip()
     year = match.group(2).strip()
@@ -1756,16 +1966,16 @@ def process_single_torrent(qb, torrent, settings):
     local_dest = settings.get('local_dest_path')
     if not local_dest:
         logger.error("No local_dest_path configured in settings.")
-        return
+        return False, "No local_dest_path configured"
 
     dest_dir = os.path.join(local_dest, folder_name)
     logger.info(f"Destination directory: {dest_dir}")
     
     try:
+        raise_if_stopped(torrent.hash)
         os.makedirs(dest_dir, exist_ok=True)
         
-        limit = settings.get('copy_speed_limit', 10)
-        logger.info(f"Using copy speed limit: {limit} MB/s")
+        logger.info(f"Using import mode: {settings.get('import_mode', 'auto')}, copy speed limit: {settings.get('copy_speed_limit', 10)} MB/s")
         
         # If it's a file
         if os.path.isfile(source_path):
@@ -1775,62 +1985,92 @@ def process_single_torrent(qb, torrent, settings):
             dest_file = os.path.join(dest_dir, new_name)
             
             if not os.path.exists(dest_file):
-                logger.info(f"Copying {source_path} to {dest_file}")
-                copy_with_progress(source_path, dest_file, torrent.hash, limit)
-                MoveHistory.create(torrent_name=torrent.name, source_path=source_path, dest_path=dest_file, status='success')
+                method, checksum = import_file(source_path, dest_file, torrent.hash, settings)
+                LIBRARY_INDEX.add(dest_dir)
+                LIBRARY_INDEX.add(dest_file)
+                WRITES.insert(MoveHistory, torrent_hash=torrent.hash, torrent_name=torrent.name, source_path=source_path, dest_path=dest_file, status='success',
+                                   import_method=method, checksum=json.dumps({dest_file: checksum}) if checksum else None)
                 
                 # Notify Telegram: Moved
                 if settings.get('telegram_notify_on_move', True):
                     send_telegram_notification(f"🚀 <b>Movie Moved to Library</b>\n\n🎬 {title} ({year})\n📂 {dest_file}")
+                return True, f"Imported to {dest_file}"
 
             else:
                 logger.info(f"File already exists: {dest_file}")
-                MoveHistory.create(torrent_name=torrent.name, status='skipped', message="Destination exists", source_path=source_path, dest_path=dest_file)
+                WRITES.insert(MoveHistory, torrent_hash=torrent.hash, torrent_name=torrent.name, status='skipped', message="Destination exists", source_path=source_path, dest_path=dest_file)
+                return True, "Destination exists"
                 
         # If it's a directory
         elif os.path.isdir(source_path):
             logger.info(f"Source is a directory: {source_path}")
             video_extensions = ['.mkv', '.mp4', '.avi']
-            copied = False
+            
+            # Plan the import up front: {dest_file: src_file}
+            plan = {}
+            found_video = False
             for root, dirs, files in os.walk(source_path):
                 for file in files:
                     if any(file.lower().endswith(ext) for ext in video_extensions):
                         # Found video
+                        found_video = True
                         src_file = os.path.join(root, file)
                         ext = os.path.splitext(file)[1]
                         new_name = f"{folder_name}{ext}"
                         dest_file = os.path.join(dest_dir, new_name)
                         
-                        if not os.path.exists(dest_file):
-                            logger.info(f"Copying {src_file} to {dest_file}")
-                            copy_with_progress(src_file, dest_file, torrent.hash, limit)
-                            copied = True
-                        else:
+                        if os.path.exists(dest_file):
                             logger.info(f"File already exists: {dest_file}")
-                            # Mark as skipped if at least one file exists?
-                            # But we might have multiple files.
-                            pass
+                        elif dest_file in plan:
+                            # Same target name: the first file found wins
+                            logger.info(f"Skipping {src_file}: {dest_file} already planned")
+                        else:
+                            plan[dest_file] = src_file
+            
+            copied = False
+            raise_if_stopped(torrent.hash)
+            if plan:
+                results = import_files_parallel([(src, dst) for dst, src in plan.items()], torrent.hash, settings)
+                methods = {method for _, method, _ in results}
+                checksums = {dst: checksum for dst, _, checksum in results if checksum}
+                LIBRARY_INDEX.add(dest_dir)
+                for dst, _, _ in results:
+                    LIBRARY_INDEX.add(dst)
+                copied = True
                         
             if copied:
-                MoveHistory.create(torrent_name=torrent.name, source_path=source_path, dest_path=dest_dir, status='success')
+                method = methods.pop() if len(methods) == 1 else 'mixed'
+                WRITES.insert(MoveHistory, torrent_hash=torrent.hash, torrent_name=torrent.name, source_path=source_path, dest_path=dest_dir, status='success',
+                                   import_method=method, checksum=json.dumps(checksums) if checksums else None)
                 
                 # Notify Telegram: Moved
                 if settings.get('telegram_notify_on_move', True):
                     send_telegram_notification(f"🚀 <b>Movie Moved to Library</b>\n\n🎬 {title} ({year})\n📂 {dest_dir}")
+                return True, f"Imported to {dest_dir}"
+
+            elif found_video:
+                # Every video is already at its destination
+                logger.info(f"All files already exist in {dest_dir}")
+                WRITES.insert(MoveHistory, torrent_hash=torrent.hash, torrent_name=torrent.name, status='skipped', message="Already in library", source_path=source_path, dest_path=dest_dir)
+                return True, "Already in library"
 
             else:
                 logger.warning(f"No video files found in {source_path}")
-                MoveHistory.create(torrent_name=torrent.name, status='skipped', message="No video file found in folder", source_path=source_path, dest_path=dest_dir)
+                WRITES.insert(MoveHistory, torrent_hash=torrent.hash, torrent_name=torrent.name, status='skipped', message="No video file found in folder", source_path=source_path, dest_path=dest_dir)
+                return True, "No video file found in folder"
         else:
              logger.error(f"Source path is valid but neither file nor dir? {source_path}")
-             MoveHistory.create(torrent_name=torrent.name, status='error', message="Invalid source type", source_path=source_path, dest_path="")
+             WRITES.insert(MoveHistory, torrent_hash=torrent.hash, torrent_name=torrent.name, status='error', message="Invalid source type", source_path=source_path, dest_path="")
+             return False, "Invalid source type"
 
     except InterruptedError:
         logger.info(f"Copy cancelled for {torrent.name}")
-        # History entry? Maybe not needed if cancelled.
+        # No history entry: the torrent stays ready to copy
+        return False, "Cancelled"
     except Exception as e:
         logger.error(f"Error moving {torrent.name}: {e}")
-        MoveHistory.create(torrent_name=torrent.name, status='error', message=str(e), source_path="", dest_path="")
+        WRITES.insert(MoveHistory, torrent_hash=torrent.hash, torrent_name=torrent.name, status='error', message=str(e), source_path="", dest_path="")
+        return False, str(e)
 
 def test_indexer_connection(url, api_key):
     """
@@ -2185,7 +2425,6 @@ def auto_download_movie(title, year, preferred_size, max_size, label=None, tmdb_
     # 3. Add to torrent client
     try:
         qb = get_qb_client(settings)
-        qb.auth_log_in()
         
         # Get torrents list BEFORE adding to compare
         torrents_before = {t['hash'] for t in qb.torrents_info()}
@@ -2348,11 +2587,8 @@ def fetch_rss_movies(limit=30):
             year = None
             if entry.get('tmdb_id'):
                 try:
-                    tmdb_url = f"https://api.themoviedb.org/3/movie/{entry['tmdb_id']}"
-                    params = {"api_key": api_key, "language": get_language()}
-                    res = requests.get(tmdb_url, params=params, timeout=5)
-                    if res.status_code == 200:
-                        tmdb_data = res.json()
+                    status_code, tmdb_data = TMDB.movie(entry['tmdb_id'], api_key, language=get_language())
+                    if status_code == 200:
                         title = tmdb_data.get('title')
                         year = tmdb_data.get('release_date', '')[:4] if tmdb_data.get('release_date') else None
                         logger.info(f"Using TMDB ID {entry['tmdb_id']} → Exact match: '{title}' ({year})")
@@ -2392,9 +2628,7 @@ def fetch_rss_movies(limit=30):
                 if watchlist_movie.watchlist_expiry and datetime.now() > watchlist_movie.watchlist_expiry:
                     # Watchlist expired - move to dashboard as "New" (no auto-download)
                     logger.info(f"Watchlist expired for '{title}' ({year}). Adding to dashboard as New.")
-                    watchlist_movie.watchlist = False
-                    watchlist_movie.watchlist_expiry = None
-                    watchlist_movie.save()
+                    WRITES.update(Movie, watchlist_movie.id, watchlist=False, watchlist_expiry=None)
                     # Continue to add to dashboard below (will NOT auto-download due to flag cleared)
                 else:
                     # Still in watchlist - check if size is now acceptable
@@ -2412,9 +2646,7 @@ def fetch_rss_movies(limit=30):
                         if size_found:
                             # Size is acceptable now - remove from watchlist and proceed with auto-download
                             logger.info(f"Acceptable size found for '{title}' ({year}). Removing from watchlist, proceeding with auto-download.")
-                            watchlist_movie.watchlist = False
-                            watchlist_movie.watchlist_expiry = None
-                            watchlist_movie.save()
+                            WRITES.update(Movie, watchlist_movie.id, watchlist=False, watchlist_expiry=None)
                             # Falls through to auto-download section below
                         else:
                             # Size still not acceptable - keep in watchlist
@@ -2450,9 +2682,7 @@ def fetch_rss_movies(limit=30):
                 # First check if torrent already exists in torrent client
                 # If it does, DON'T auto-download but DO add to dashboard as RSS entry
                 try:
-                    qb = get_qb_client(settings)
-                    qb.auth_log_in()
-                    existing_torrents = qb.torrents_info()
+                    existing_torrents = SNAPSHOT.get_torrents()
                     
                     # Check if any torrent matches this movie (by title/year)
                     torrent_exists = False
@@ -2491,11 +2721,11 @@ def fetch_rss_movies(limit=30):
                             if metadata:
                                 # Download Images using torrent hash (not pseudo-hash)
                                 if metadata.get('poster_path'):
-                                    poster_url = f"https://image.tmdb.org/t/p/w500{metadata.get('poster_path')}"
+                                    poster_url = image_url(metadata.get('poster_path'), 'w500')
                                     poster_local = download_image(poster_url, f"{torrent_hash}_poster.jpg")
                                     
                                 if metadata.get('backdrop_path'):
-                                    backdrop_url = f"https://image.tmdb.org/t/p/w1280{metadata.get('backdrop_path')}"
+                                    backdrop_url = image_url(metadata.get('backdrop_path'), 'w1280')
                                     backdrop_local = download_image(backdrop_url, f"{torrent_hash}_backdrop.jpg")
                             
                             # Create DB Entry with REAL torrent hash
@@ -2583,14 +2813,14 @@ def fetch_rss_movies(limit=30):
             if metadata:
                 # Download Images
                 if metadata.get('poster_path'):
-                    poster_url = f"https://image.tmdb.org/t/p/w500{metadata.get('poster_path')}"
+                    poster_url = image_url(metadata.get('poster_path'), 'w500')
                     poster_local = download_image(poster_url, f"{pseudo_hash}_poster.jpg")
                     
                 if metadata.get('backdrop_path'):
-                    backdrop_url = f"https://image.tmdb.org/t/p/w1280{metadata.get('backdrop_path')}"
+                    backdrop_url = image_url(metadata.get('backdrop_path'), 'w1280')
                     backdrop_local = download_image(backdrop_url, f"{pseudo_hash}_backdrop.jpg")
             
-            # Create DB Entry
+            # Create DB Entry (directly: only rows that really got inserted are counted)
             Movie.create(
                 torrent_hash=pseudo_hash,
                 title=metadata.get('title', title) if metadata else title,
@@ -2620,6 +2850,9 @@ def fetch_rss_movies(limit=30):
             
         except Exception as e:
             logger.error(f"Error adding RSS movie {entry['title']}: {e}")
+    
+    # Callers list the dashboard right after a refresh (watchlist flags are queued)
+    WRITES.flush(timeout=FLUSH_TIMEOUT)
             
     return {
         "success": True, 
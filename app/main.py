@@ -1,12 +1,21 @@
 import json
 import asyncio
+import anyio
 import logging
-from fastapi import FastAPI, BackgroundTasks
+from fastapi import FastAPI, BackgroundTasks, Request, Response
+from fastapi.routing import APIRoute
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, StreamingResponse
 from contextlib import asynccontextmanager
-from database import init_db, MoveHistory
-from logic import process_torrents, get_active_torrents, manual_move, mark_as_moved, load_settings, save_settings, get_copy_progress, stop_copy, get_movie_data
+from database import init_db, MoveHistory, db_scoped, REQUEST_THREADS
+from tmdb_cache import init_cache
+from torrent_snapshot import SNAPSHOT
+from events import EVENTS, format_sse
+from library_index import LIBRARY_INDEX
+from enrichment import ENRICHMENT
+from logic import process_torrents, get_active_torrents, manual_move, mark_as_moved, load_settings, save_settings, get_copy_progress, stop_copy, get_movie_data, push_snapshot_changes, enrich_movie, enqueue_missing_metadata, get_unresolved_torrents, retry_unresolved, SETTINGS, on_settings_changed, run_copy_job
+from copy_queue import COPY_QUEUE
+from write_queue import WRITES
 
 # Setup logging
 logging.basicConfig(level=logging.INFO)
@@ -18,6 +27,12 @@ async def scheduler():
         settings = load_settings()
         interval = settings.get('poll_interval', 5) * 60
         
+        # Retry unmatched movies whose backoff window has expired
+        try:
+            enqueue_missing_metadata()
+        except Exception as e:
+            logger.error(f"Error queueing metadata retries: {e}")
+        
         # Check if scheduler is enabled
         if settings.get('enable_scheduler', False) and interval > 0:
             logger.info("Running scheduled check...")
@@ -34,7 +49,19 @@ async def scheduler():
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup
+    # Every request thread needs a pooled connection: keep the threadpool within the pool
+    anyio.to_thread.current_default_thread_limiter().total_tokens = REQUEST_THREADS
     init_db()
+    init_cache()
+    WRITES.start()
+    SETTINGS.subscribe(on_settings_changed)
+    SNAPSHOT.add_listener(push_snapshot_changes)
+    SNAPSHOT.start()
+    LIBRARY_INDEX.start(lambda: load_settings().get('local_dest_path'))
+    ENRICHMENT.start(enrich_movie, workers=load_settings().get('metadata_workers', 2))
+    # Resumed jobs wait for the first torrent sync instead of failing with 'Torrent not found'
+    COPY_QUEUE.start(run_copy_job, stop_hook=stop_copy, workers=load_settings().get('copy_workers', 2), ready=SNAPSHOT.is_ready)
+    enqueue_missing_metadata()
     asyncio.create_task(scheduler())
     
     # Import and start RSS scheduler
@@ -43,8 +70,23 @@ async def lifespan(app: FastAPI):
     
     yield
     # Shutdown
+    SNAPSHOT.stop()
+    LIBRARY_INDEX.stop()
+    COPY_QUEUE.stop()
+    WRITES.stop()
+
+class DBScopedRoute(APIRoute):
+    """
+    Sync endpoints run on FastAPI's thread pool; give each request its own
+    pooled database connection and return it when the request ends.
+    """
+    def __init__(self, path, endpoint, **kwargs):
+        if not asyncio.iscoroutinefunction(endpoint):
+            endpoint = db_scoped(endpoint)
+        super().__init__(path, endpoint, **kwargs)
 
 app = FastAPI(lifespan=lifespan)
+app.router.route_class = DBScopedRoute
 
 # API Endpoints
 @app.get("/api/history")
@@ -52,13 +94,24 @@ def get_history():
     query = MoveHistory.select().order_by(MoveHistory.timestamp.desc()).limit(50)
     return list(query.dicts())
 
+@app.post("/api/history/{history_id}/verify")
+def verify_history_endpoint(history_id: int):
+    """Re-read the copied library files and compare with the checksums taken during the copy"""
+    from logic import verify_import
+    return verify_import(history_id)
+
 @app.post("/api/trigger")
 def trigger_check(background_tasks: BackgroundTasks):
     background_tasks.add_task(process_torrents, None)
     return {"status": "triggered"}
 
+def mark_snapshot_freshness(response):
+    # The torrent list is served from the last snapshot even if qBittorrent is down
+    response.headers["X-Snapshot-Stale"] = "1" if SNAPSHOT.is_stale() else "0"
+
 @app.get("/api/torrents")
-def api_get_torrents():
+def api_get_torrents(response: Response):
+    mark_snapshot_freshness(response)
     torrents = get_active_torrents(None)
     progress_data = get_copy_progress()
     
@@ -73,6 +126,29 @@ def api_get_torrents():
             
     return torrents
 
+@app.get("/api/events")
+async def event_stream(request: Request):
+    """
+    Server-sent events with torrent diffs, movie status changes and copy progress.
+    Clients fetch the full state once and then apply these changes.
+    """
+    queue = EVENTS.subscribe()
+
+    async def generate():
+        try:
+            yield format_sse('ready', {})
+            while not await request.is_disconnected():
+                try:
+                    event_type, data = await asyncio.wait_for(queue.get(), timeout=15)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                yield format_sse(event_type, data)
+        finally:
+            EVENTS.unsubscribe(queue)
+
+    return StreamingResponse(generate(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
 @app.get("/api/settings")
 def get_settings():
     return load_settings()
@@ -82,6 +158,52 @@ def update_settings(settings: dict):
     save_settings(settings)
     return {"success": True, "message": "Settings saved"}
 
+@app.get("/api/enrichment")
+def get_enrichment_status():
+    """Metadata enrichment queue: worker count, queued/running jobs and totals"""
+    return ENRICHMENT.status()
+
+@app.get("/api/jobs")
+def get_copy_jobs():
+    """Copy queue: active jobs in run order plus recently finished ones"""
+    return COPY_QUEUE.list_jobs()
+
+@app.post("/api/jobs/reorder")
+def reorder_copy_jobs(payload: dict):
+    """Move queued jobs to the front of their priority, in the given order"""
+    moved = COPY_QUEUE.reorder(payload.get('torrent_hashes', []))
+    return {"success": True, "moved": moved}
+
+@app.post("/api/jobs/{torrent_hash}/priority")
+def set_copy_job_priority(torrent_hash: str, payload: dict):
+    """Change the priority of a queued job (higher runs first)"""
+    try:
+        priority = int(payload.get('priority'))
+    except (TypeError, ValueError):
+        return {"success": False, "message": "Invalid priority"}
+    if COPY_QUEUE.set_priority(torrent_hash, priority):
+        return {"success": True, "message": "Priority updated"}
+    return {"success": False, "message": "Job is not queued"}
+
+@app.post("/api/jobs/{torrent_hash}/cancel")
+def cancel_copy_job(torrent_hash: str):
+    """Cancel a queued job, or stop it if it is already copying"""
+    if COPY_QUEUE.cancel(torrent_hash):
+        return {"success": True, "message": "Job cancelled"}
+    return {"success": False, "message": "No active job for this torrent"}
+
+@app.get("/api/unresolved")
+def get_unresolved_endpoint():
+    """Torrents TMDB could not match, with attempts and next scheduled lookup"""
+    return {"success": True, "torrents": get_unresolved_torrents()}
+
+@app.post("/api/unresolved/{torrent_hash}/retry")
+def retry_unresolved_endpoint(torrent_hash: str):
+    """Skip the backoff window and look the torrent up again now"""
+    if retry_unresolved(torrent_hash):
+        return {"success": True, "message": "Metadata lookup queued"}
+    return {"success": False, "message": "Torrent is not in the unresolved list"}
+
 @app.get("/api/indexer/stats/{indexer_id}")
 def get_indexer_stats(indexer_id: int):
     """Get statistics from Prowlarr indexer (tracker count and languages)"""
@@ -105,7 +227,8 @@ def get_indexer_stats(indexer_id: int):
 
 
 @app.get("/api/movies")
-def get_movies():
+def get_movies(response: Response):
+    mark_snapshot_freshness(response)
     settings = load_settings()
     api_key = settings.get('tmdb_api_key')
     if not api_key:
@@ -152,9 +275,9 @@ def get_movie_details_endpoint(torrent_hash: str):
     return details
 
 @app.post("/api/move/{torrent_hash}")
-def move_torrent_endpoint(torrent_hash: str, background_tasks: BackgroundTasks):
-    background_tasks.add_task(manual_move, torrent_hash)
-    return {"status": "started", "message": "Move started in background"}
+def move_torrent_endpoint(torrent_hash: str):
+    result = manual_move(torrent_hash)
+    return {"status": "queued" if result['success'] else "error", "message": result['message']}
 
 @app.post("/api/mark/{torrent_hash}")
 def mark_moved_endpoint(torrent_hash: str):
@@ -171,7 +294,8 @@ def delete_movie_endpoint(torrent_hash: str):
 
 @app.post("/api/stop/{torrent_hash}")
 def stop_copy_endpoint(torrent_hash: str):
-    success = stop_copy(torrent_hash)
+    # Cancels the copy job (stops it if already copying)
+    success = COPY_QUEUE.cancel(torrent_hash) or stop_copy(torrent_hash)
     if success:
         return {"success": True, "message": "Stop signal sent"}
     return {"success": False, "message": "Could not stop copy (maybe not running?)"}
@@ -179,8 +303,9 @@ def stop_copy_endpoint(torrent_hash: str):
 @app.post("/api/movies/batch-delete")
 def batch_delete_movies(payload: dict):
     """Delete multiple movies from DB and/or delete files from destination"""
-    from logic import delete_movie, get_qb_client, add_to_watchlist
-    from database import Movie, MoveHistory
+    from logic import delete_movie, add_to_watchlist
+    from database import Movie
+    from status_resolver import history_for
     import os
     import shutil
     
@@ -221,18 +346,6 @@ def batch_delete_movies(payload: dict):
     settings = load_settings()
     dest_path = settings.get('local_dest_path', '')
     
-    # Pre-fetch active torrents to map hash -> name (to find history)
-    hash_to_name = {}
-    if delete_from_destination:
-        try:
-            qb = get_qb_client(settings)
-            qb.auth_log_in()
-            torrents = qb.torrents_info(torrent_hashes=torrent_hashes)
-            for t in torrents:
-                hash_to_name[t.hash.lower()] = t.name
-        except Exception as e:
-            logger.error(f"Error fetching torrents for delete mapping: {e}")
-
     for hash in torrent_hashes:
         try:
             # Get movie from database
@@ -247,15 +360,9 @@ def batch_delete_movies(payload: dict):
                 target_path = None
                 
                 # 1. Try to find path from History (Most accurate)
-                torrent_name = hash_to_name.get(hash.lower())
-                if torrent_name:
-                    history = MoveHistory.select().where(
-                        MoveHistory.torrent_name == torrent_name, 
-                        MoveHistory.status == 'success'
-                    ).order_by(MoveHistory.timestamp.desc()).first()
-                    
-                    if history and history.dest_path:
-                        target_path = history.dest_path
+                history = history_for(hash.lower(), status='success', torrent_name=movie.torrent_name if movie else None)
+                if history and history.dest_path:
+                    target_path = history.dest_path
                 
                 # 2. Fallback: Construct from Movie Title (if history missing)
                 if not target_path and movie:
@@ -282,6 +389,7 @@ def batch_delete_movies(payload: dict):
                             shutil.rmtree(target_path)
                         else:
                             os.remove(target_path)
+                        LIBRARY_INDEX.discard(target_path)
                         deleted_from_folder += 1
                         logger.info(f"Deleted files at: {target_path}")
                     except Exception as e:
@@ -307,9 +415,9 @@ def batch_delete_movies(payload: dict):
     }
 
 @app.post("/api/movies/batch-copy")
-def batch_copy_movies(payload: dict, background_tasks: BackgroundTasks):
-    """Trigger copy for multiple movies (excluding Error and Orphaned)"""
-    from logic import manual_move
+def batch_copy_movies(payload: dict):
+    """Queue copies for multiple movies (excluding Error and Orphaned)"""
+    from logic import queue_copy
     from database import Movie
     
     torrent_hashes = payload.get('torrent_hashes', [])
@@ -332,8 +440,11 @@ def batch_copy_movies(payload: dict, background_tasks: BackgroundTasks):
                 skipped += 1
                 continue
             
-            # Trigger copy via background task
-            background_tasks.add_task(manual_move, hash)
+            # Queue copy job (workers cap concurrent disk streams)
+            result = queue_copy(hash, source='batch')
+            if not result['success']:
+                errors.append(f"{hash}: {result['message']}")
+                continue
             copied += 1
                 
         except Exception as e:
@@ -376,7 +487,7 @@ def test_telegram(payload: dict):
 def search_tmdb(q: str):
     """Search TMDB for movies"""
     from logic import load_settings, get_language
-    import requests
+    from tmdb import TMDB, image_url
     
     if not q or len(q.strip()) < 2:
         return {"success": False, "message": "Query too short", "results": []}
@@ -388,20 +499,11 @@ def search_tmdb(q: str):
         if not tmdb_api_key:
             return {"success": False, "message": "TMDB API key not configured", "results": []}
         
-        url = "https://api.themoviedb.org/3/search/movie"
-        params = {
-            "api_key": tmdb_api_key,
-            "query": q.strip(),
-            "language": get_language(),
-            "page": 1
-        }
-        
-        response = requests.get(url, params=params, timeout=10)
+        status_code, data = TMDB.search_movie(q.strip(), tmdb_api_key, language=get_language(), page=1, timeout=10)
         
-        if response.status_code != 200:
-            return {"success": False, "message": f"TMDB API error: {response.status_code}", "results": []}
+        if status_code != 200:
+            return {"success": False, "message": f"TMDB API error: {status_code}", "results": []}
         
-        data = response.json()
         results = []
         
         for movie in data.get('results', [])[:10]:  # Limit to 10 results
@@ -412,7 +514,7 @@ def search_tmdb(q: str):
                 'original_title': movie.get('original_title', ''),  # English title
                 'year': movie.get('release_date', '')[:4] if movie.get('release_date') else None,
                 'overview': movie.get('overview', ''),
-                'poster': f"https://image.tmdb.org/t/p/w500{poster_path}" if poster_path else None,
+                'poster': image_url(poster_path, 'w500'),
                 'vote_average': movie.get('vote_average', 0)
             })
         
@@ -454,7 +556,6 @@ def add_torrent_from_url(payload: dict):
         settings = load_settings()
         auto_copy_manual = settings.get('auto_copy_manual_search', False)
         qb = get_qb_client(settings)
-        qb.auth_log_in()
         
         # Add torrent from URL with tag if auto-copy is enabled
         if auto_copy_manual:
@@ -543,7 +644,10 @@ def get_ignored_movies():
     from database import Movie
     
     try:
-        ignored_movies = Movie.select().where(Movie.ignored == True)
+        ignored_movies = (Movie
+                          .select(Movie.torrent_hash, Movie.title, Movie.year, Movie.poster_path)
+                          .where(Movie.ignored == True)
+                          .namedtuples())
         movies_list = []
         for movie in ignored_movies:
             movies_list.append({
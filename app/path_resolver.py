@@ -0,0 +1,160 @@
+import os
+import time
+import threading
+import logging
+
+logger = logging.getLogger("PathResolver")
+
+# Seconds a filename index of local_source_path is trusted before a rebuild
+INDEX_TTL = 10 * 60
+# Minimum seconds between rebuilds triggered by lookups that missed
+MISS_REBUILD_INTERVAL = 60
+
+
+def normalize(path):
+    return path.replace('\\', '/').rstrip('/') if path else path
+
+
+def apply_path_mappings(path, mappings):
+    """
+    Translates a path as qBittorrent sees it into the local path, using the
+    longest matching rule of mappings [{'remote': ..., 'local': ...}].
+    Returns None when no rule matches.
+    """
+    path = normalize(path)
+    if not path:
+        return None
+
+    best = None
+    for rule in mappings or []:
+        remote = normalize(rule.get('remote', ''))
+        local = rule.get('local', '')
+        if not remote or not local:
+            continue
+        if path == remote or path.startswith(remote + '/'):
+            if best is None or len(remote) > len(best[0]):
+                best = (remote, local)
+
+    if best is None:
+        return None
+    remote, local = best
+    rest = path[len(remote):].lstrip('/')
+    return os.path.join(local, *rest.split('/')) if rest else local
+
+
+class FilenameIndex:
+    """
+    Cached {name: path} of every file and folder under a root, so a torrent
+    that isn't where we expect it costs one dict lookup instead of an os.walk
+    of the whole download share. Rebuilt on TTL or after a miss (rate limited).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()  # Guards the fields below (held only for lookups/swaps)
+        self._build_lock = threading.Lock()  # One os.walk at a time
+        self._root = None
+        self._names = {}
+        self._built_at = 0
+
+    def _rebuild(self, root, requested_at):
+        with self._build_lock:
+            # Another thread rebuilt it while we waited for the walk
+            with self._lock:
+                if self._root == root and self._built_at >= requested_at:
+                    return
+
+            # Walk without holding self._lock: lookups keep being served
+            start = time.time()
+            names = {}
+            for dirpath, dirs, files in os.walk(root):
+                for name in dirs + files:
+                    names.setdefault(name, os.path.join(dirpath, name))
+
+            with self._lock:
+                self._root = root
+                self._names = names
+                self._built_at = time.time()
+        logger.info(f"Filename index of {root}: {len(names)} entries in {time.time() - start:.1f}s")
+
+    def _lookup(self, root, name):
+        with self._lock:
+            path = self._names.get(name) if self._root == root else None
+        return path if path and os.path.exists(path) else None
+
+    def find(self, root, name):
+        now = time.time()
+        with self._lock:
+            expired = self._root != root or now - self._built_at > INDEX_TTL
+        if expired:
+            self._rebuild(root, now)
+
+        path = self._lookup(root, name)
+        if path:
+            return path
+
+        # Missed or stale: new download since the last build?
+        with self._lock:
+            rebuild = now - self._built_at > MISS_REBUILD_INTERVAL
+        if rebuild:
+            self._rebuild(root, now)
+            return self._lookup(root, name)
+        return None
+
+
+FILENAME_INDEX = FilenameIndex()
+
+
+def _existing(*candidates):
+    for path in candidates:
+        if path and os.path.exists(path):
+            return path
+    return None
+
+
+def resolve_source(torrent, settings, item_name, get_files=None):
+    """
+    Local path of a torrent's content (file or folder), tried cheapest first:
+    1. content_path / save_path through the path mapping rules
+    2. item_name directly under local_source_path
+    3. the torrent's file list (get_files() -> [relative file names]) under
+       the mapped save_path or local_source_path
+    4. the cached filename index of local_source_path
+    Returns None if not found.
+    """
+    mappings = settings.get('path_mappings', [])
+    local_source = settings.get('local_source_path')
+    save_path = apply_path_mappings(torrent.get('save_path'), mappings)
+
+    # 1. Path mapping rules
+    path = _existing(
+        apply_path_mappings(torrent.get('content_path'), mappings),
+        os.path.join(save_path, item_name) if save_path else None
+    )
+    if path:
+        return path
+
+    # 2. Direct join (fastest when no mapping is configured)
+    if local_source:
+        path = _existing(os.path.join(local_source, item_name))
+        if path:
+            return path
+
+    # 3. Torrent file list
+    bases = [b for b in (save_path, local_source) if b]
+    if get_files and bases:
+        try:
+            files = [normalize(f) for f in get_files()]
+        except Exception as e:
+            logger.warning(f"Could not get file list for {item_name}: {e}")
+            files = []
+        for name in files:
+            parts = name.split('/')
+            for base in bases:
+                if os.path.exists(os.path.join(base, *parts)):
+                    # Multi-file torrent: return its top folder
+                    return os.path.join(base, parts[0])
+
+    # 4. Last resort: cached index of the whole share
+    if local_source and os.path.isdir(local_source):
+        return FILENAME_INDEX.find(local_source, item_name)
+    return None
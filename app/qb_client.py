@@ -0,0 +1,78 @@
+import threading
+import logging
+import qbittorrentapi
+
+logger = logging.getLogger("QBClient")
+
+# Settings that define the connection. Any change triggers a rebuild.
+QB_SETTINGS_KEYS = ('qb_host', 'qb_port', 'qb_user', 'qb_pass')
+
+
+class QBClientManager:
+    """
+    Process-wide, thread-safe holder for one authenticated qBittorrent client.
+    The underlying requests session keeps its connections alive, so API
+    calls from the FastAPI threadpool, copy threads and schedulers reuse
+    the same TCP connections and session cookie.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._client = None
+        self._key = None
+
+    def _build(self, settings):
+        client = qbittorrentapi.Client(
+            host=settings.get('qb_host'),
+            port=settings.get('qb_port'),
+            username=settings.get('qb_user'),
+            password=settings.get('qb_pass')
+        )
+        client.auth_log_in()
+        return client
+
+    def get(self, settings):
+        """
+        Returns the shared client, logging in only when it is first built
+        or when any qb_* setting has changed since.
+        """
+        key = tuple(settings.get(k) for k in QB_SETTINGS_KEYS)
+        with self._lock:
+            if self._client is None or key != self._key:
+                if self._client is not None:
+                    logger.info("Torrent client settings changed, rebuilding connection")
+                    self._close(self._client)
+                self._client = self._build(settings)
+                self._key = key
+            return self._client
+
+    def request(self, settings, func):
+        """
+        Runs func(client). If qBittorrent answers 403 (expired session cookie),
+        logs in again once and retries.
+        """
+        client = self.get(settings)
+        try:
+            return func(client)
+        except qbittorrentapi.Forbidden403Error:
+            logger.info("Torrent client session expired, logging in again")
+            with self._lock:
+                client.auth_log_in()
+            return func(client)
+
+    def invalidate(self):
+        """Drops the shared client so the next call builds a fresh one."""
+        with self._lock:
+            if self._client is not None:
+                self._close(self._client)
+            self._client = None
+            self._key = None
+
+    def _close(self, client):
+        try:
+            client.auth_log_out()
+        except Exception:
+            pass
+
+
+QB_CLIENTS = QBClientManager()
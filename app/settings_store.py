@@ -0,0 +1,127 @@
+import os
+import copy
+import json
+import time
+import threading
+import logging
+
+logger = logging.getLogger("Settings")
+
+# Minimum seconds between mtime checks of the settings file
+STAT_INTERVAL = 1.0
+
+
+class SettingsStore:
+    """
+    Parsed settings.json kept in memory. The file is only re-read when its
+    mtime changes (edits made outside the app) or after save(); every change
+    bumps version and is pushed to subscribers as callback(old, new).
+    get() hands out copies, so callers may modify the dict they receive.
+    """
+
+    def __init__(self, path, defaults):
+        self.path = path
+        self.defaults = defaults
+        self.version = 0
+        self._lock = threading.Lock()
+        self._settings = None
+        self._mtime = None
+        self._checked_at = 0
+        self._subscribers = []
+
+    def _read(self):
+        """Parses the file merged with defaults. Returns (settings, mtime)."""
+        mtime = os.stat(self.path).st_mtime
+        with open(self.path, 'r') as f:
+            settings = json.load(f)
+        # Merge with defaults to ensure all keys exist
+        for key, val in self.defaults.items():
+            if key not in settings:
+                settings[key] = copy.deepcopy(val)
+        return settings, mtime
+
+    def _reload_if_changed(self):
+        now = time.monotonic()
+        if self._settings is not None and now - self._checked_at < STAT_INTERVAL:
+            return None
+        self._checked_at = now
+
+        if not os.path.exists(self.path):
+            if self._settings is None:
+                self._write(copy.deepcopy(self.defaults))
+            return None
+
+        try:
+            if os.stat(self.path).st_mtime == self._mtime:
+                return None
+            settings, mtime = self._read()
+        except (OSError, ValueError) as e:
+            logger.error(f"Error reading {self.path}: {e}")
+            if self._settings is None:
+                self._settings = copy.deepcopy(self.defaults)
+            return None
+
+        old = self._settings
+        self._settings = settings
+        self._mtime = mtime
+        self.version += 1
+        return old
+
+    def _write(self, settings):
+        # Temp file + rename: readers never see a half-written file
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(settings, f, indent=4)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+
+        for key, val in self.defaults.items():
+            if key not in settings:
+                settings[key] = copy.deepcopy(val)
+        self._settings = settings
+        self._mtime = os.stat(self.path).st_mtime
+        self._checked_at = time.monotonic()
+        self.version += 1
+
+    def get(self):
+        with self._lock:
+            first_load = self._settings is None
+            old = self._reload_if_changed()
+            settings = self._settings
+            current = copy.deepcopy(settings)
+        if not first_load and old is not None:
+            logger.info("Settings file changed on disk, reloaded")
+            self._notify(old, settings)
+        return current
+
+    def value(self, key, default=None):
+        """Single setting without copying the whole dict."""
+        with self._lock:
+            first_load = self._settings is None
+            old = self._reload_if_changed()
+            settings = self._settings
+            value = copy.deepcopy(settings.get(key, default))
+        if not first_load and old is not None:
+            logger.info("Settings file changed on disk, reloaded")
+            self._notify(old, settings)
+        return value
+
+    def save(self, settings):
+        settings = copy.deepcopy(settings)
+        with self._lock:
+            old = self._settings
+            self._write(settings)
+        if old is not None:
+            self._notify(old, settings)
+
+    def subscribe(self, callback):
+        """Registers callback(old_settings, new_settings), called after every change."""
+        self._subscribers.append(callback)
+
+    def _notify(self, old, new):
+        for callback in list(self._subscribers):
+            try:
+                callback(old, new)
+            except Exception as e:
+                logger.error(f"Error in settings subscriber: {e}")
@@ -7,6 +7,10 @@
  * - RSS countdown: 1s → 10s (90% menos requests)
  * - Polling inteligente: 2s cuando hay torrents activos, 10s cuando no
  * - Pausa polling cuando página inactiva, reactiva instantáneamente al volver
+ *
+ * Eventos del servidor:
+ * - Con EventSource disponible, el estado completo se carga una vez y después
+ *   solo se aplican los cambios enviados por /api/events (sin polling)
  */
 
 import { state } from './state.js';
@@ -17,6 +21,7 @@ import {
 } from './api.js';
 import { showToast, formatBytes, formatDate, setButtonLoading } from './ui.js';
 import { getStatusClass } from './templates.js';
+import { API_BASE } from './config.js';
 
 // Referencias DOM
 
@@ -29,6 +34,9 @@ let rssCountdownEl;
 let isPageVisible = true;
 let currentPollingInterval = 2000;
 
+// Conexión de eventos del servidor (SSE)
+let eventSource = null;
+
 /**
  * Inicializa el módulo de dashboard
  * Líneas 73-94 de app.js
@@ -146,8 +154,8 @@ async function handleFetchRSS() {
 export async function manualMove(hash) {
     const data = await apiMoveManually(hash);
 
-    if (data.status === 'started') {
-        showToast('Move started', 'success');
+    if (data.status === 'queued') {
+        showToast(data.message || 'Move queued', 'success');
 
         // If in details view for this movie, reload it
         const detailsContainer = document.getElementById('movie-details-content');
@@ -211,6 +219,114 @@ async function updateRSSCountdown() {
  * 3. Fetch inmediato al reactivar para datos frescos
  */
 export function startDashboardAutoRefresh(interval = 2000) {
+    if (window.EventSource) {
+        startEventStream();
+        return;
+    }
+    startPolling(interval);
+}
+
+/**
+ * Suscripción a /api/events
+ * - Al (re)conectar se pide el estado completo una sola vez
+ * - Después se aplican los diffs de torrents, películas y copias
+ */
+function startEventStream() {
+    if (eventSource) return;
+
+    eventSource = new EventSource(`${API_BASE}/events`);
+
+    eventSource.addEventListener('ready', refreshAll);
+    eventSource.addEventListener('resync', refreshAll);
+
+    eventSource.addEventListener('torrents', (e) => {
+        applyTorrentChanges(JSON.parse(e.data));
+    });
+
+    eventSource.addEventListener('movie', async (e) => {
+        const { applyMovieUpdate } = await import('./movies.js');
+        applyMovieUpdate(JSON.parse(e.data));
+    });
+
+    eventSource.addEventListener('copy', (e) => {
+        applyCopyProgress(JSON.parse(e.data));
+    });
+
+    // EventSource reconecta solo; 'ready' vuelve a cargar el estado completo
+    eventSource.onerror = () => {
+        console.warn('⚠️ Event stream disconnected, retrying...');
+    };
+}
+
+/**
+ * Carga completa de torrents y películas
+ */
+async function refreshAll() {
+    await fetchTorrents();
+    const { fetchMovies } = await import('./movies.js');
+    await fetchMovies(true);
+}
+
+/**
+ * Aplica un diff de torrents (solo campos cambiados por hash)
+ * Si cambia el estado de un torrent, o aparece/desaparece uno,
+ * se recarga la lista porque el status calculado puede cambiar
+ */
+function applyTorrentChanges({ changed = {}, removed = [], full = false }) {
+    const torrents = state.getTorrents();
+    const byHash = new Map(torrents.map(t => [t.hash, t]));
+    let needsReload = full || removed.length > 0;
+
+    for (const [hash, fields] of Object.entries(changed)) {
+        const torrent = byHash.get(hash);
+        if (!torrent || ('state' in fields && fields.state !== torrent.state)) {
+            needsReload = true;
+            continue;
+        }
+        Object.assign(torrent, fields);
+    }
+
+    if (needsReload) {
+        fetchTorrents();
+    } else {
+        state.setTorrents(torrents);
+    }
+}
+
+// Hashes cuya copia ya provocó una recarga completa (una sola vez por copia)
+const copyRefreshed = new Set();
+
+/**
+ * Aplica progreso de copia; al terminar se recarga el estado
+ */
+function applyCopyProgress({ hash, progress }) {
+    const torrents = state.getTorrents();
+    const torrent = torrents.find(t => t.hash === hash);
+
+    if (progress && progress.status === 'copying') {
+        if (torrent) {
+            torrent.copy_progress = progress;
+            torrent.status = 'copying';
+            state.setTorrents(torrents);
+        }
+        // La tarjeta de película pasa a "copying" solo una vez, aunque el
+        // torrent aún no esté en el estado local
+        if (!copyRefreshed.has(hash)) {
+            copyRefreshed.add(hash);
+            refreshAll();
+        }
+        return;
+    }
+
+    // Copia terminada, cancelada o con error
+    copyRefreshed.delete(hash);
+    refreshAll();
+}
+
+/**
+ * Polling clásico (navegadores sin EventSource)
+ */
+function startPolling(interval = 2000) {
     if (state.refreshInterval) {
         clearInterval(state.refreshInterval);
     }
@@ -328,6 +444,10 @@ function setupPageVisibilityDetection() {
  * Detiene auto-refresh
  */
 export function stopDashboardAutoRefresh() {
+    if (eventSource) {
+        eventSource.close();
+        eventSource = null;
+    }
     if (state.refreshInterval) {
         clearInterval(state.refreshInterval);
         state.refreshInterval = null;
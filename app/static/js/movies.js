@@ -139,6 +139,24 @@ function renderMovieCards(movies) {
     updateSelectionUI();
 }
 
+/**
+ * Aplica un cambio de película recibido por /api/events
+ * Si la tarjeta no existe todavía (película nueva) se recarga la lista
+ */
+export function applyMovieUpdate(movie) {
+    if (!moviesGrid) return;
+
+    const card = moviesGrid.querySelector(`.movie-card[data-hash="${movie.torrent_hash}"]`);
+    if (!card) {
+        fetchMovies(true);
+        return;
+    }
+
+    const { icon: statusIcon, label: statusLabel } = getStatusIconAndLabel(movie.status);
+    const posterSrc = movie.poster_url || 'https://via.placeholder.com/300x450?text=No+Cover';
+    updateMovieCard(card, movie, posterSrc, getStatusClass(movie.status), statusIcon, statusLabel);
+}
+
 /**
  * Actualiza una tarjeta de película existente
  */
@@ -309,7 +327,7 @@ function renderMovieDetails(container, movie, hash) {
                 <div class="details-progress-container">
                     <div class="progress-info">
                         <span>Copying... ${movie.copy_progress.percent}%</span>
-                        <span>${movie.copy_progress.speed} MB/s</span>
+                        <span>${movie.copy_progress.speed} MB/s${formatEta(movie.copy_progress.eta)}</span>
                     </div>
                     <div class="progress-bar large">
                         <div class="details-progress-fill copying" style="width: ${movie.copy_progress.percent}%"></div>
@@ -480,6 +498,19 @@ function stopDetailsPolling() {
     }
 }
 
+/**
+ * Tiempo restante de la copia (segundos) como " · 12m 30s"
+ */
+function formatEta(seconds) {
+    if (seconds === null || seconds === undefined || seconds <= 0) return '';
+    const h = Math.floor(seconds / 3600);
+    const m = Math.floor((seconds % 3600) / 60);
+    const s = Math.floor(seconds % 60);
+    if (h > 0) return ` · ${h}h ${m}m`;
+    if (m > 0) return ` · ${m}m ${s}s`;
+    return ` · ${s}s`;
+}
+
 function updateProgressUI(progress, type) {
     const container = document.querySelector('.details-progress-container');
     if (!container) return;
@@ -492,7 +523,8 @@ function updateProgressUI(progress, type) {
     const percent = type === 'copying' ? progress.percent : progress.progress.toFixed(1);
 
     if (percentEl) percentEl.textContent = `${label} ${percent}%`;
-    if (speedEl) speedEl.textContent = `${progress.speed} MB/s`;
+    const eta = type === 'copying' ? formatEta(progress.eta) : '';
+    if (speedEl) speedEl.textContent = `${progress.speed} MB/s${eta}`;
     if (barEl) {
         barEl.style.width = `${percent}%`;
         barEl.className = `details-progress-fill ${type}`;
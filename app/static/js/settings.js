@@ -126,10 +126,15 @@ function renderSettings() {
     // Paths
     document.getElementById('setting-local-source').value = settings.local_source_path || '';
     document.getElementById('setting-local-dest').value = settings.local_dest_path || '';
+    document.getElementById('setting-path-mappings').value = (settings.path_mappings || [])
+        .map(rule => `${rule.remote} => ${rule.local}`)
+        .join('\n');
 
     // Advanced
     document.getElementById('setting-auto-copy-manual').checked = settings.auto_copy_manual_search || false;
     document.getElementById('setting-speed-limit').value = settings.copy_speed_limit || 10;
+    document.getElementById('setting-import-mode').value = settings.import_mode || 'auto';
+    document.getElementById('setting-verify-after-copy').checked = settings.verify_after_copy || false;
     document.getElementById('setting-tmdb-key').value = settings.tmdb_api_key || '';
     document.getElementById('setting-language').value = settings.language || 'es-ES';
 
@@ -439,6 +444,16 @@ function removeRSSFeed(index) {
     renderRSSFeedsList();
 }
 
+/**
+ * Convierte las líneas "remoto => local" en reglas {remote, local}
+ */
+function parsePathMappings(text) {
+    return text.split('\n')
+        .map(line => line.split('=>').map(part => part.trim()))
+        .filter(parts => parts.length === 2 && parts[0] && parts[1])
+        .map(([remote, local]) => ({ remote, local }));
+}
+
 /**
  * Guarda todos los settings
  * LÃ­neas 951-986 de app.js
@@ -454,8 +469,11 @@ async function handleSaveSettings() {
         qb_pass: document.getElementById('setting-qb-pass').value,
         local_source_path: document.getElementById('setting-local-source').value,
         local_dest_path: document.getElementById('setting-local-dest').value,
+        path_mappings: parsePathMappings(document.getElementById('setting-path-mappings').value),
         auto_copy_manual_search: document.getElementById('setting-auto-copy-manual').checked,
         copy_speed_limit: parseInt(document.getElementById('setting-speed-limit').value),
+        import_mode: document.getElementById('setting-import-mode').value,
+        verify_after_copy: document.getElementById('setting-verify-after-copy').checked,
         tmdb_api_key: document.getElementById('setting-tmdb-key').value,
         language: document.getElementById('setting-language').value,
         telegram_bot_token: document.getElementById('setting-telegram-token').value,
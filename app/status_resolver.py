@@ -0,0 +1,163 @@
+import os
+import re
+from peewee import fn
+from database import MoveHistory
+from library_index import LIBRARY_INDEX
+
+# qBittorrent states grouped by how they map to a dashboard status
+NEW_STATES = ['metaDL', 'allocating', 'queuedDL']
+DOWNLOADING_STATES = ['downloading', 'forceDL', 'stalledDL', 'pausedDL']
+COMPLETED_STATES = ['uploading', 'pausedUP', 'queuedUP', 'stalledUP', 'completed', 'checkingUP', 'checkingDL']
+ERROR_STATES = ['error', 'missingFiles']
+
+# Keep IN (...) lists below SQLite's host parameter limit
+QUERY_CHUNK_SIZE = 500
+
+
+# Hashes already checked for history rows written before MoveHistory.torrent_hash
+_LEGACY_CHECKED = set()
+
+
+def latest_history(torrents):
+    """
+    Returns {torrent_hash: MoveHistory} with the most recent history row for
+    each torrent, using one grouped query per chunk instead of one query per torrent.
+    """
+    hashes = list({t['hash'] for t in torrents if t.get('hash')})
+    result = {}
+
+    for i in range(0, len(hashes), QUERY_CHUNK_SIZE):
+        chunk = hashes[i:i + QUERY_CHUNK_SIZE]
+        latest = (MoveHistory
+                  .select(MoveHistory.torrent_hash, fn.MAX(MoveHistory.timestamp).alias('max_ts'))
+                  .where(MoveHistory.torrent_hash.in_(chunk))
+                  .group_by(MoveHistory.torrent_hash)
+                  .alias('latest'))
+        query = (MoveHistory
+                 .select()
+                 .join(latest, on=((MoveHistory.torrent_hash == latest.c.torrent_hash) &
+                                   (MoveHistory.timestamp == latest.c.max_ts)))
+                 .order_by(MoveHistory.id))
+        # Same-timestamp ties: the highest id wins, as with order_by(timestamp desc)
+        for row in query:
+            result[row.torrent_hash] = row
+
+    unchecked = [t for t in torrents if t.get('hash') and t['hash'] not in result and t['hash'] not in _LEGACY_CHECKED]
+    if unchecked:
+        result.update(link_legacy_history(unchecked))
+    return result
+
+
+def link_legacy_history(torrents):
+    """
+    Attaches history rows that predate MoveHistory.torrent_hash (and weren't
+    backfilled) to their torrent by name, once. Returns {torrent_hash: latest row}.
+    """
+    by_name = {t['name']: t['hash'] for t in torrents if t.get('name')}
+    names = list(by_name)
+    linked = {}
+
+    for i in range(0, len(names), QUERY_CHUNK_SIZE):
+        chunk = names[i:i + QUERY_CHUNK_SIZE]
+        rows = (MoveHistory
+                .select()
+                .where(MoveHistory.torrent_hash.is_null() & MoveHistory.torrent_name.in_(chunk))
+                .order_by(MoveHistory.timestamp, MoveHistory.id))
+        for row in rows:
+            row.torrent_hash = by_name[row.torrent_name]
+            linked[row.torrent_hash] = row
+
+    for name in {row.torrent_name for row in linked.values()}:
+        (MoveHistory
+         .update(torrent_hash=by_name[name])
+         .where(MoveHistory.torrent_hash.is_null() & (MoveHistory.torrent_name == name))
+         .execute())
+
+    _LEGACY_CHECKED.update(t['hash'] for t in torrents)
+    return linked
+
+
+def history_for(torrent_hash, status=None, torrent_name=None):
+    """
+    Most recent history row of one torrent (optionally with a given status).
+    With torrent_name, rows written before MoveHistory.torrent_hash are
+    linked to the torrent first, so an old 'success' still counts.
+    """
+    if torrent_name and torrent_hash not in _LEGACY_CHECKED:
+        link_legacy_history([{'hash': torrent_hash, 'name': torrent_name}])
+
+    query = MoveHistory.select().where(MoveHistory.torrent_hash == torrent_hash)
+    if status:
+        query = query.where(MoveHistory.status == status)
+    return query.order_by(MoveHistory.timestamp.desc(), MoveHistory.id.desc()).first()
+
+
+def expected_dest_path(torrent, local_dest, history=None):
+    """
+    Library path a moved torrent should live at: the path recorded in history,
+    or 'Title (Year)' under local_dest derived from content_path.
+    Returns None when it cannot be determined.
+    """
+    if history and history.dest_path:
+        return history.dest_path
+
+    content_path = torrent.get('content_path')
+    if not local_dest or not content_path:
+        return None
+
+    normalized_path = content_path.replace('\\', '/')
+    item_name = os.path.basename(normalized_path.rstrip('/'))
+    match = re.search(r"(.+?)\s\((\d{4})\)", item_name)
+    if not match:
+        return None
+
+    folder_name = f"{match.group(1).strip()} ({match.group(2).strip()})"
+    return os.path.join(local_dest, folder_name)
+
+
+def resolve_status(torrent, history, local_dest, copying=False):
+    """
+    Applies the dashboard status rules to one torrent:
+    copying > active download state > last history entry > torrent state.
+    """
+    if copying:
+        return 'copying'
+
+    state = torrent.get('state')
+
+    # 1. Active downloads take priority
+    if state in NEW_STATES:
+        return 'new'
+    if state in DOWNLOADING_STATES:
+        return 'downloading'
+
+    # 2. Not downloading: has it been moved before?
+    if history:
+        if history.status in ('success', 'manual'):
+            dest_path = expected_dest_path(torrent, local_dest, history)
+            if dest_path and not LIBRARY_INDEX.exists(dest_path):
+                return 'missing'
+            return 'moved' if history.status == 'success' else 'moved_manually'
+        if history.status in ('skipped', 'error'):
+            return history.status
+
+    # 3. No history
+    if state in ERROR_STATES:
+        return 'error'
+    return 'pending'
+
+
+def resolve_statuses(torrents, settings, copying=()):
+    """
+    Resolves the status of every torrent at once.
+    Returns {hash: (status, latest MoveHistory or None)}.
+    """
+    local_dest = settings.get('local_dest_path')
+    histories = latest_history(torrents)
+
+    result = {}
+    for t in torrents:
+        history = histories.get(t['hash'])
+        status = resolve_status(t, history, local_dest, copying=t['hash'] in copying)
+        result[t['hash']] = (status, history)
+    return result
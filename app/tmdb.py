@@ -0,0 +1,114 @@
+import time
+import threading
+import logging
+import requests
+from requests.adapters import HTTPAdapter
+import tmdb_cache
+
+logger = logging.getLogger("TMDB")
+
+API_BASE = "https://api.themoviedb.org/3"
+IMAGE_BASE = "https://image.tmdb.org/t/p"
+
+# TMDB allows roughly 50 requests/second per IP; stay below it
+MAX_REQUESTS_PER_SECOND = 40
+# Retries after a 429 (rate limited) answer
+MAX_RATE_LIMIT_RETRIES = 2
+
+
+def _cacheable(data):
+    # An empty search result is not cached: the unresolved-torrent retries
+    # (and manual retries) must ask TMDB again, not get the same empty answer
+    return bool(data) and data.get('results') != []
+
+
+class TMDBClient:
+    """
+    Thin TMDB API client on one pooled keep-alive requests.Session,
+    shared by metadata enrichment, identify, RSS ingest and manual search.
+    """
+
+    def __init__(self):
+        self._session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=2, pool_maxsize=16)
+        self._session.mount("https://", adapter)
+        self._rate_lock = threading.Lock()
+        self._next_slot = 0.0
+
+    def _wait_for_slot(self):
+        # Evenly spaced requests across all threads
+        with self._rate_lock:
+            now = time.monotonic()
+            wait = self._next_slot - now
+            self._next_slot = max(now, self._next_slot) + 1.0 / MAX_REQUESTS_PER_SECOND
+        if wait > 0:
+            time.sleep(wait)
+
+    def get(self, path, api_key, timeout=5, cache=True, **params):
+        """
+        GET {API_BASE}{path}. Returns (status_code, json_data).
+        json_data is {} when the body is not JSON.
+        Successful answers are cached on disk (tmdb_cache); fresh entries are
+        served locally, stale ones are revalidated with If-None-Match.
+        Searches that found nothing are never cached.
+        """
+        params = {k: v for k, v in params.items() if v is not None}
+
+        key = tmdb_cache.cache_key(path, params) if cache else None
+        cached = tmdb_cache.lookup(key) if key else None
+        if cached and not _cacheable(cached[0]):
+            cached = None  # Cached before empty results were skipped
+        if cached and cached[2]:
+            return 200, cached[0]
+
+        headers = {}
+        if cached and cached[1]:
+            headers['If-None-Match'] = cached[1]
+
+        params['api_key'] = api_key
+
+        for attempt in range(MAX_RATE_LIMIT_RETRIES + 1):
+            self._wait_for_slot()
+            res = self._session.get(f"{API_BASE}{path}", params=params, headers=headers, timeout=timeout)
+
+            if res.status_code == 429 and attempt < MAX_RATE_LIMIT_RETRIES:
+                retry_after = float(res.headers.get('Retry-After', 1))
+                logger.warning(f"TMDB rate limit hit, retrying in {retry_after}s")
+                time.sleep(retry_after)
+                continue
+            break
+
+        if res.status_code == 304 and cached:
+            tmdb_cache.touch(key, path)
+            return 200, cached[0]
+
+        try:
+            data = res.json()
+        except ValueError:
+            data = {}
+
+        if key and res.status_code == 200 and _cacheable(data):
+            tmdb_cache.store(key, path, data, etag=res.headers.get('ETag'))
+        elif cached and res.status_code >= 500:
+            # TMDB is down: a stale answer beats none
+            return 200, cached[0]
+        return res.status_code, data
+
+    def search_movie(self, query, api_key, language=None, year=None, page=None, timeout=5):
+        return self.get("/search/movie", api_key, timeout=timeout, query=query, language=language, year=year, page=page)
+
+    def movie(self, tmdb_id, api_key, language=None, append=None, timeout=5):
+        """
+        Movie details. append is a list of sub-resources folded into the same
+        request (e.g. ['credits', 'external_ids']) via append_to_response.
+        """
+        append_to_response = ",".join(append) if append else None
+        return self.get(f"/movie/{tmdb_id}", api_key, timeout=timeout, language=language, append_to_response=append_to_response)
+
+
+def image_url(path, size):
+    """Full image URL for a TMDB file path (size: 'w185', 'w500', 'w1280' ...)."""
+    return f"{IMAGE_BASE}/{size}{path}" if path else None
+
+
+TMDB = TMDBClient()
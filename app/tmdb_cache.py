@@ -0,0 +1,100 @@
+import re
+import json
+import time
+import logging
+from peewee import SqliteDatabase, Model, CharField, TextField, FloatField
+
+logger = logging.getLogger("TMDBCache")
+
+# Separate file so cache writes never contend with history.db
+cache_db = SqliteDatabase('/data/tmdb_cache.db', pragmas={
+    'journal_mode': 'wal',
+    'synchronous': 0
+})
+
+# Seconds a cached response is served without asking TMDB, by endpoint.
+# Movie details barely change; searches pick up new releases sooner.
+ENDPOINT_TTLS = [
+    (re.compile(r"^/search/"), 24 * 60 * 60),
+    (re.compile(r"^/movie/\d+$"), 7 * 24 * 60 * 60),
+]
+DEFAULT_TTL = 24 * 60 * 60
+# Stale entries are kept this long for ETag revalidation, then pruned
+MAX_AGE = 60 * 24 * 60 * 60
+
+# Params that do not change the response
+IGNORED_PARAMS = ('api_key',)
+
+
+class CachedResponse(Model):
+    key = CharField(unique=True)
+    body = TextField()
+    etag = CharField(null=True)
+    fetched_at = FloatField()
+    expires_at = FloatField()
+
+    class Meta:
+        database = cache_db
+        table_name = 'tmdb_response'
+
+
+def init_cache():
+    cache_db.connect(reuse_if_open=True)
+    cache_db.create_tables([CachedResponse])
+    pruned = CachedResponse.delete().where(CachedResponse.fetched_at < time.time() - MAX_AGE).execute()
+    if pruned:
+        logger.info(f"Pruned {pruned} old TMDB cache entries")
+
+
+def cache_key(path, params):
+    """Normalized key: path plus sorted params, without the API key."""
+    items = sorted((k, str(v).strip().lower() if k == 'query' else str(v))
+                   for k, v in params.items() if k not in IGNORED_PARAMS and v is not None)
+    query = "&".join(f"{k}={v}" for k, v in items)
+    return f"{path}?{query}" if query else path
+
+
+def ttl_for(path):
+    for pattern, ttl in ENDPOINT_TTLS:
+        if pattern.match(path):
+            return ttl
+    return DEFAULT_TTL
+
+
+def lookup(key):
+    """Returns (data, etag, is_fresh) or None when nothing is cached."""
+    try:
+        row = CachedResponse.get_or_none(CachedResponse.key == key)
+    except Exception as e:
+        logger.error(f"Error reading TMDB cache: {e}")
+        return None
+    if not row:
+        return None
+    try:
+        data = json.loads(row.body)
+    except ValueError:
+        return None
+    return data, row.etag, row.expires_at > time.time()
+
+
+def store(key, path, data, etag=None):
+    now = time.time()
+    try:
+        (CachedResponse
+         .insert(key=key, body=json.dumps(data), etag=etag, fetched_at=now, expires_at=now + ttl_for(path))
+         .on_conflict_replace()
+         .execute())
+    except Exception as e:
+        logger.error(f"Error writing TMDB cache: {e}")
+
+
+def touch(key, path):
+    """Marks a revalidated (304) entry as fresh again."""
+    now = time.time()
+    try:
+        (CachedResponse
+         .update(fetched_at=now, expires_at=now + ttl_for(path))
+         .where(CachedResponse.key == key)
+         .execute())
+    except Exception as e:
+        logger.error(f"Error updating TMDB cache: {e}")
@@ -0,0 +1,172 @@
+import time
+import threading
+import logging
+from qb_client import QB_CLIENTS
+
+logger = logging.getLogger("TorrentSnapshot")
+
+# Fallback refresh interval (seconds) when settings don't define qb_sync_interval
+DEFAULT_SYNC_INTERVAL = 2
+
+
+class TorrentInfo(dict):
+    """
+    Plain dict copy of a torrent entry that also allows attribute access
+    (t.name, t.hash, ...) like qbittorrentapi's TorrentDictionary.
+    """
+    def __getattr__(self, key):
+        try:
+            return self[key]
+        except KeyError:
+            raise AttributeError(key)
+
+
+class TorrentSnapshot:
+    """
+    In-memory torrent table kept up to date with qBittorrent's
+    sync/maindata endpoint. Only the first request downloads the full list,
+    every following refresh applies the rid-based delta.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._torrents = {}  # {hash: {field: value}}
+        self._rid = 0
+        self._thread = None
+        self._stop = threading.Event()
+        self._listeners = []
+        self.updated_at = 0  # Last successful refresh (epoch seconds)
+        self.last_error = None
+
+    def refresh(self):
+        """
+        Pulls one delta from qBittorrent and merges it into the table.
+        Returns True on success, False if the torrent client is unreachable.
+        """
+        with self._refresh_lock:
+            rid = self._rid
+            try:
+                from logic import load_settings
+                data = dict(QB_CLIENTS.request(load_settings(), lambda qb: qb.sync_maindata(rid=rid)))
+            except Exception as e:
+                if self.last_error != str(e):
+                    logger.error(f"Error syncing torrent client: {e}")
+                self.last_error = str(e)
+                # Force a full update on next attempt
+                self._rid = 0
+                return False
+
+            full_update = bool(data.get('full_update'))
+            changed = {h: dict(fields) for h, fields in (data.get('torrents') or {}).items()}
+            removed = list(data.get('torrents_removed') or [])
+
+            with self._lock:
+                if full_update:
+                    self._torrents = {}
+
+                for torrent_hash, fields in changed.items():
+                    entry = self._torrents.setdefault(torrent_hash, {'hash': torrent_hash})
+                    entry.update(fields)
+
+                for torrent_hash in removed:
+                    self._torrents.pop(torrent_hash, None)
+
+                self._rid = data.get('rid', 0)
+                self.updated_at = time.time()
+
+            self.last_error = None
+
+        if changed or removed or full_update:
+            for listener in list(self._listeners):
+                try:
+                    listener(changed, removed, full_update)
+                except Exception as e:
+                    logger.error(f"Error in snapshot listener: {e}")
+        return True
+
+    def reset(self):
+        """Next refresh asks for a full update (e.g. qBittorrent was re-pointed)."""
+        with self._lock:
+            self._rid = 0
+
+    def add_listener(self, callback):
+        """
+        Registers callback(changed, removed, full_update), called after every
+        refresh that brought changes. changed only holds the fields that
+        changed for each hash.
+        """
+        self._listeners.append(callback)
+
+    def is_stale(self):
+        """True when the last successful sync is older than two sync intervals."""
+        return time.time() - self.updated_at > _sync_interval() * 2
+
+    def _ensure_fresh(self):
+        # Never blocks the caller: a down torrent client would hold every request
+        # for the full client timeout. The last snapshot is served (is_stale()
+        # tells if it is old) and, if the background thread isn't running
+        # (not started yet, or died), one refresh is kicked off in the background.
+        if self._thread and self._thread.is_alive():
+            return
+        if self.is_stale() and not self._refresh_lock.locked():
+            threading.Thread(target=self.refresh, name="torrent-snapshot-refresh", daemon=True).start()
+
+    def is_ready(self):
+        """True once at least one sync with the torrent client succeeded."""
+        return self.updated_at > 0
+
+    def get_torrents(self, status_filter=None):
+        """
+        Returns a list of TorrentInfo copies.
+        status_filter='completed' mirrors torrents_info(status_filter='completed').
+        """
+        self._ensure_fresh()
+        with self._lock:
+            torrents = [TorrentInfo(t) for t in self._torrents.values()]
+
+        if status_filter == 'completed':
+            torrents = [t for t in torrents if t.get('progress', 0) >= 1]
+        return torrents
+
+    def get_torrent(self, torrent_hash):
+        """Returns a TorrentInfo copy for the given hash (case-insensitive) or None."""
+        if not torrent_hash:
+            return None
+        self._ensure_fresh()
+        with self._lock:
+            torrent = self._torrents.get(torrent_hash) or self._torrents.get(torrent_hash.lower())
+            if torrent is None:
+                for h, t in self._torrents.items():
+                    if h.lower() == torrent_hash.lower():
+                        torrent = t
+                        break
+            return TorrentInfo(torrent) if torrent is not None else None
+
+    def _run(self):
+        logger.info("Torrent snapshot service started")
+        while not self._stop.is_set():
+            self.refresh()
+            self._stop.wait(_sync_interval())
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="torrent-snapshot", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+
+def _sync_interval():
+    from logic import load_settings
+    try:
+        return max(1, float(load_settings().get('qb_sync_interval', DEFAULT_SYNC_INTERVAL)))
+    except (TypeError, ValueError):
+        return DEFAULT_SYNC_INTERVAL
+
+
+# Process-wide snapshot shared by all endpoints and background tasks
+SNAPSHOT = TorrentSnapshot()
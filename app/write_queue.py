@@ -0,0 +1,204 @@
+import time
+import threading
+import logging
+from database import db, connection_scope
+
+logger = logging.getLogger("WriteQueue")
+
+# Longest a queued write waits before its batch is committed (seconds)
+FLUSH_INTERVAL = 0.2
+# Pending rows that trigger a commit without waiting for FLUSH_INTERVAL
+MAX_BATCH = 500
+# Queued inserts past which insert() writes synchronously (writer can't keep up or is failing)
+MAX_PENDING_INSERTS = 10000
+# Seconds the writer waits after a failed batch before retrying it
+RETRY_PAUSE = 1
+# Suggested flush() timeout for callers (seconds)
+FLUSH_TIMEOUT = 10
+
+
+class WriteQueue:
+    """
+    Single writer thread for small, frequent writes (progress/status updates,
+    history rows, RSS entries). Callers queue write intents and return at
+    once; the writer commits everything pending in one transaction every
+    FLUSH_INTERVAL or MAX_BATCH rows, so N updates cost one fsync instead of N.
+    Repeated updates to the same row are coalesced (last value wins).
+    Callers that need to read their own writes call flush().
+    Before start() (or after stop()) intents are written immediately.
+    """
+
+    def __init__(self, interval=FLUSH_INTERVAL, max_batch=MAX_BATCH):
+        self._cond = threading.Condition()
+        self._interval = interval
+        self._max_batch = max_batch
+        self._updates = {}  # {(model, row id): {field: value}}
+        self._inserts = []  # [(model, row data, ignore conflicts)]
+        self._queued = 0  # Sequence number of the last queued intent
+        self._committed = 0  # Sequence number of the last committed intent
+        self._flush_requested = False
+        self._thread = None
+        self._running = False
+
+    def start(self):
+        with self._cond:
+            if self._thread:
+                return
+            self._running = True
+            self._thread = threading.Thread(target=self._run, name="db-writer", daemon=True)
+            self._thread.start()
+        logger.info("Database write queue started")
+
+    def stop(self, timeout=10):
+        """Commits what is pending and stops the writer thread."""
+        with self._cond:
+            if not self._thread:
+                return
+            self._running = False
+            self._cond.notify_all()
+            thread = self._thread
+        thread.join(timeout)
+        with self._cond:
+            self._thread = None
+            self._cond.notify_all()
+
+    # --- Write intents ---
+
+    def update(self, model, row_id, **fields):
+        """Queues UPDATE model SET fields WHERE id = row_id, merged with any pending update of that row."""
+        if not fields:
+            return
+        with self._cond:
+            if self._running:
+                self._updates.setdefault((model, row_id), {}).update(fields)
+                self._queued += 1
+                self._cond.notify_all()
+                return
+        model.update(**fields).where(model._meta.primary_key == row_id).execute()
+
+    def insert(self, model, ignore_conflicts=False, **fields):
+        """
+        Queues an INSERT. Field defaults (e.g. timestamps) are taken now, not
+        at commit time. The new row's id is not returned; flush() first if you
+        need to read it back.
+        """
+        # Instantiating the model fills in the field defaults
+        data = dict(model(**fields).__data__)
+        with self._cond:
+            if self._running and len(self._inserts) < MAX_PENDING_INSERTS:
+                self._inserts.append((model, data, ignore_conflicts))
+                self._queued += 1
+                self._cond.notify_all()
+                return
+        self._insert(model, data, ignore_conflicts)
+
+    def flush(self, timeout=FLUSH_TIMEOUT):
+        """
+        Blocks until every intent queued before the call is committed.
+        Returns False (and logs) if that took longer than timeout seconds.
+        """
+        with self._cond:
+            target = self._queued
+            if not self._running or self._committed >= target:
+                return True
+            self._flush_requested = True
+            self._cond.notify_all()
+            done = self._cond.wait_for(lambda: self._committed >= target or not self._thread, timeout)
+        if not done:
+            logger.warning(f"Write queue flush timed out after {timeout}s ({self.pending()} rows pending)")
+        return done
+
+    def pending(self):
+        with self._cond:
+            return len(self._updates) + len(self._inserts)
+
+    # --- Writer ---
+
+    def _run(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._updates or self._inserts or not self._running)
+                if not self._running and not (self._updates or self._inserts):
+                    return
+
+                # Give more writes a chance to join this batch
+                deadline = time.monotonic() + self._interval
+                while (self._running and not self._flush_requested
+                       and len(self._updates) + len(self._inserts) < self._max_batch):
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+
+                updates, inserts = self._updates, self._inserts
+                self._updates, self._inserts = {}, []
+                self._flush_requested = False
+                sequence = self._queued
+
+            try:
+                with connection_scope():
+                    self._commit(updates, inserts)
+            except Exception as e:
+                # Couldn't even get a connection: keep the batch and retry it
+                logger.error(f"Error writing batch, retrying in {RETRY_PAUSE}s: {e}")
+                self._restore(updates, inserts)
+                time.sleep(RETRY_PAUSE)
+                continue
+
+            with self._cond:
+                self._committed = sequence
+                self._cond.notify_all()
+
+    def _restore(self, updates, inserts):
+        """Puts a failed batch back in front of what was queued since."""
+        with self._cond:
+            for key, fields in self._updates.items():
+                updates.setdefault(key, {}).update(fields)
+            self._updates = updates
+            self._inserts = inserts + self._inserts
+
+    def _commit(self, updates, inserts):
+        start = time.time()
+        try:
+            with db.atomic():
+                for model, data, ignore_conflicts in inserts:
+                    self._insert(model, data, ignore_conflicts)
+                self._bulk_update(updates)
+        except Exception as e:
+            # One bad row must not lose the whole batch: retry row by row
+            logger.error(f"Batched write failed ({e}), retrying {len(inserts) + len(updates)} rows one by one")
+            self._commit_one_by_one(updates, inserts)
+            return
+        logger.debug(f"Committed {len(inserts)} inserts and {len(updates)} updates in {(time.time() - start) * 1000:.0f} ms")
+
+    def _commit_one_by_one(self, updates, inserts):
+        for model, data, ignore_conflicts in inserts:
+            try:
+                self._insert(model, data, ignore_conflicts)
+            except Exception as e:
+                logger.error(f"Error inserting into {model.__name__}: {e}")
+        for (model, row_id), fields in updates.items():
+            try:
+                model.update(**fields).where(model._meta.primary_key == row_id).execute()
+            except Exception as e:
+                logger.error(f"Error updating {model.__name__} {row_id}: {e}")
+
+    @staticmethod
+    def _insert(model, data, ignore_conflicts):
+        query = model.insert(data)
+        if ignore_conflicts:
+            query = query.on_conflict_ignore()
+        query.execute()
+
+    @staticmethod
+    def _bulk_update(updates):
+        # Rows with the same set of changed columns become one batched UPDATE
+        groups = {}
+        for (model, row_id), fields in updates.items():
+            groups.setdefault((model, tuple(sorted(fields))), []).append(
+                model(**{model._meta.primary_key.name: row_id}, **fields))
+        for (model, fields), rows in groups.items():
+            model.bulk_update(rows, fields=[getattr(model, f) for f in fields], batch_size=200)
+
+
+WRITES = WriteQueue()
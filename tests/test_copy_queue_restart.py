@@ -0,0 +1,82 @@
+import datetime
+import threading
+import time
+
+import pytest
+
+import copy_queue
+import database
+import logic
+from copy_queue import CopyQueue, RetryLater
+from database import CopyJob
+
+
+@pytest.fixture
+def jobs_db(tmp_path):
+    database.db.init(str(tmp_path / 'history.db'))
+    database.db.connect(reuse_if_open=True)
+    database.db.create_tables([CopyJob])
+    yield
+    database.db.close()
+
+
+def wait_for(predicate, timeout=5):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.05)
+    return False
+
+
+def job_status(torrent_hash):
+    return CopyJob.get(CopyJob.torrent_hash == torrent_hash).status
+
+
+def test_job_running_at_restart_waits_for_torrent_list(jobs_db):
+    # Left 'running' by the previous process
+    CopyJob.create(torrent_hash='bbb', torrent_name='Movie (2020)', status='running',
+                   started_at=datetime.datetime.now())
+
+    ready = threading.Event()
+    calls = []
+
+    def handler(torrent_hash):
+        calls.append(torrent_hash)
+        return True, "Imported"
+
+    queue = CopyQueue()
+    queue.start(handler, workers=1, ready=ready.is_set)
+
+    time.sleep(copy_queue.READY_POLL * 1.5)
+    assert calls == []
+    assert job_status('bbb') == 'queued'
+
+    ready.set()
+    assert wait_for(lambda: job_status('bbb') == 'done')
+    assert calls == ['bbb']
+    queue.stop()
+
+
+def test_retry_later_requeues_instead_of_failing(jobs_db):
+    CopyJob.create(torrent_hash='ccc', torrent_name='Movie (2021)', status='queued')
+
+    def handler(torrent_hash):
+        raise RetryLater("Torrent not found", delay=60)
+
+    queue = CopyQueue()
+    queue.start(handler, workers=1)
+
+    assert wait_for(lambda: CopyJob.get(CopyJob.torrent_hash == 'ccc').attempts == 1)
+    queue.stop()
+    job = CopyJob.get(CopyJob.torrent_hash == 'ccc')
+    assert job.status == 'queued'
+    assert job.message == "Torrent not found"
+    assert job.not_before > datetime.datetime.now()
+
+
+def test_run_copy_job_retries_before_first_torrent_sync(tmp_path, monkeypatch):
+    monkeypatch.setattr(logic.SETTINGS, 'path', str(tmp_path / 'settings.json'))
+    # The shared snapshot hasn't synced in tests
+    with pytest.raises(RetryLater):
+        logic.run_copy_job('bbb')
@@ -0,0 +1,69 @@
+import os
+
+import pytest
+
+import database
+import logic
+from database import MoveHistory
+from torrent_snapshot import TorrentInfo
+
+
+@pytest.fixture
+def library(tmp_path):
+    database.db.init(str(tmp_path / 'history.db'))
+    database.db.connect(reuse_if_open=True)
+    database.db.create_tables([MoveHistory])
+
+    source = tmp_path / 'downloads'
+    dest = tmp_path / 'library'
+    source.mkdir()
+    dest.mkdir()
+    (source / 'Movie (2020).mkv').write_bytes(os.urandom(256 * 1024))
+
+    settings = {
+        'local_source_path': str(source),
+        'local_dest_path': str(dest),
+        'verify_after_copy': True,
+        'import_mode': 'copy',
+        'copy_speed_limit': 0,
+        'telegram_notify_on_move': False
+    }
+    torrent = TorrentInfo(hash='abc123', name='Movie (2020).mkv',
+                          content_path=str(source / 'Movie (2020).mkv'))
+    yield settings, torrent, dest / 'Movie (2020)' / 'Movie (2020).mkv'
+    database.db.close()
+
+
+def test_checksum_mismatch_removes_copy_and_retry_copies_again(library, monkeypatch):
+    settings, torrent, dst = library
+
+    monkeypatch.setattr(logic, 'verify_checksum', lambda *args, **kwargs: False)
+    success, message = logic.process_single_torrent(torrent, settings)
+
+    assert not success
+    assert 'Checksum mismatch' in message
+    assert not dst.exists()
+    assert not os.path.exists(str(dst) + '.part')
+
+    monkeypatch.undo()
+    success, message = logic.process_single_torrent(torrent, settings)
+
+    assert success
+    assert message == f"Imported to {dst}"
+    assert dst.read_bytes() == open(torrent.content_path, 'rb').read()
+    assert [h.status for h in MoveHistory.select().order_by(MoveHistory.id)] == ['error', 'success']
+
+
+def test_folder_already_in_library_is_not_reported_as_empty(library, tmp_path):
+    settings, _, dst = library
+    folder = tmp_path / 'downloads' / 'Movie (2020)'
+    folder.mkdir()
+    (folder / 'Movie (2020).mkv').write_bytes(b'video')
+    dst.parent.mkdir()
+    dst.write_bytes(b'video')
+    torrent = TorrentInfo(hash='def456', name='Movie (2020)', content_path=str(folder))
+
+    assert logic.process_single_torrent(torrent, settings) == (True, "Already in library")
+
+    (folder / 'Movie (2020).mkv').unlink()
+    assert logic.process_single_torrent(torrent, settings) == (True, "No video file found in folder")